@@ -0,0 +1,59 @@
+"""
+Microbenchmark: per-request CSV scan vs the per-crop statistics table
+(crop_stats.CropStatsTable) the planner serves fertilizer data from.
+
+    python bench_crop_index.py --repeat 20
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from crop_stats import DATA_PATH, ensure_stats
+
+
+def scan_lookup(crop_df, crop_name):
+    # What get_water_fertilizer_plan used to do on every call
+    crop_info = crop_df[crop_df["Crop"].str.lower() == crop_name.lower()]
+    if crop_info.empty:
+        return None
+    crop_row = crop_info.iloc[0]
+    return crop_row["N"], crop_row["P"], crop_row["K"], crop_row["Notes"]
+
+
+def index_lookup(table, crop_name):
+    # What get_water_fertilizer_plan does, with the old first-row statistic
+    i = table.lookup(crop_name)
+    if i is None:
+        return None
+    N, P, K = table.npk_for([i], statistic="first")[0]
+    return N, P, K, table.notes[i]
+
+
+def timed(fn, arg, names, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name in names:
+            fn(arg, name)
+    return (time.perf_counter() - start) / (repeat * len(names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    crop_df = pd.read_csv(DATA_PATH)
+    start = time.perf_counter()
+    table = ensure_stats()
+    load = time.perf_counter() - start
+
+    names = sorted(crop_df["Crop"].unique())
+    mismatched = [n for n in names if tuple(scan_lookup(crop_df, n)) != tuple(index_lookup(table, n))]
+    print(f"{len(crop_df)} rows, {len(names)} crops; table loaded in {load * 1e3:.1f}ms; "
+          f"{len(mismatched)} crops differ between methods")
+
+    before = timed(scan_lookup, crop_df, names, args.repeat)
+    after = timed(index_lookup, table, names, args.repeat)
+    print(f"scan per request : {before * 1e6:9.1f}us")
+    print(f"table lookup     : {after * 1e6:9.1f}us  ({before / after:,.0f}x faster)")
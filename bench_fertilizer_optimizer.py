@@ -0,0 +1,64 @@
+"""
+Benchmark: batched fertilizer mix optimizer over many fields.
+
+Times FertilizerOptimizer.optimize on random N/P/K gaps and checks the
+optimal cost against scipy's linprog on a sample of fields.
+
+    python bench_fertilizer_optimizer.py --fields 100000 --check 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fertilizer_optimizer import FertilizerOptimizer
+
+
+def random_gaps(fields, seed=0):
+    rng = np.random.default_rng(seed)
+    gaps = rng.uniform(0, [200, 120, 120], size=(fields, 3))
+    # Plenty of fields already meet one or more nutrients
+    gaps[rng.random((fields, 3)) < 0.2] = 0
+    return gaps
+
+
+def check_against_linprog(optimizer, gaps, kg):
+    from scipy.optimize import linprog
+
+    worst = 0.0
+    for gap, ours in zip(gaps, kg):
+        reference = linprog(optimizer.price_per_kg, A_ub=-optimizer.content, b_ub=-gap, bounds=(0, None))
+        ours_cost = ours @ optimizer.price_per_kg
+        worst = max(worst, abs(ours_cost - reference.fun) / max(reference.fun, 1.0))
+    return worst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", type=int, default=200, help="fields to verify with scipy (0 to skip)")
+    args = parser.parse_args()
+
+    optimizer = FertilizerOptimizer()
+    gaps = random_gaps(args.fields)
+    print(f"{len(optimizer.names)} products, {len(optimizer.bases)} candidate bases, {args.fields:,} fields")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        plan = optimizer.optimize(gaps, area_ha=1.5)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"optimize: {best * 1e3:.1f}ms ({args.fields / best:,.0f} fields/s), "
+          f"{plan['feasible'].mean() * 100:.1f}% feasible")
+
+    covered = (plan["supplied"] >= gaps - 1e-6).all(axis=1)[plan["feasible"]]
+    print(f"gaps covered by the kg/ha mix: {covered.mean() * 100:.1f}%")
+
+    if args.check:
+        try:
+            error = check_against_linprog(optimizer, gaps[:args.check], plan["kg_per_ha"][:args.check])
+            print(f"max relative cost difference vs scipy linprog ({args.check} fields): {error:.2e}")
+        except ImportError:
+            print("scipy not installed, skipping linprog check")
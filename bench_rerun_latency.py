@@ -0,0 +1,232 @@
+"""
+Rerun latency of app.py on a live Streamlit server: full-script reruns
+(AGRIINTEL_FRAGMENTS=0, the behaviour before fragments) vs fragment reruns.
+
+For each mode a `streamlit run app.py` server is started with
+AGRIINTEL_RERUN_TIMING=1. A websocket client opens a page, then changes one
+widget per rerun the way a browser does. For each scenario it reports:
+
+  client    send -> script_finished round trip
+  app       time spent in app.py itself, from rerun_timing.py's log
+            ("script" for full reruns, the section's fragment otherwise)
+  deltas    UI updates sent per rerun, and their bytes
+
+Streamlit runs gc.collect() after every script run (runner.postScriptGC).
+Its cost grows with the heap and is the same in both modes, so
+--no-post-script-gc shows the part of the round trip the app controls.
+
+    python bench_rerun_latency.py --reruns 200
+    python bench_rerun_latency.py --reruns 200 --no-post-script-gc --json rerun_latency.json
+
+Measured on a 1 vCPU Linux VM with Streamlit 1.65, 200 reruns per
+scenario, p50 / p95 in ms (full -> fragment):
+
+  default config   client                          app                         deltas, bytes
+  roi_area         113.3 / 178.3 -> 111.4 / 184.5  11.4 / 16.1 -> 7.6 / 11.5   34, 6548 -> 23, 5152
+  roi_labor        117.4 / 170.3 -> 100.8 / 163.1  12.1 / 16.1 -> 6.5 /  9.4   34, 6558 -> 23, 5162
+  rot_curr         112.3 / 179.2 -> 108.7 / 168.8   8.0 / 10.9 -> 0.8 /  1.9   20, 5458 ->  3, 1665
+
+  --no-post-script-gc
+  roi_area          48.0 /  52.2 ->  48.0 /  50.3  14.3 / 24.1 -> 9.2 / 12.9
+  roi_labor         48.0 /  52.1 ->  48.0 /  48.6  13.4 / 22.2 -> 8.9 / 11.6
+  rot_curr          48.0 /  49.5 ->  47.9 /  48.1   8.6 / 15.6 -> 0.7 /  2.6
+
+Fragments cut the app's own time by a third or more on ROI and by 90% on
+rotation, and the UI updates sent by 30-85%. With the default config the
+round trip is dominated by the post-run gc.collect() (about 60 ms here), so
+it barely moves. Without it the 48 ms client floor is Streamlit's own and the same in
+both modes. The Water & Fertilizer inputs sit in a form and trigger no
+rerun until it is submitted.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name: (page, widget key, WidgetState field, values cycled through, fragment timed by rerun_timing)
+SCENARIOS = {
+    "roi_area": ("ROI", "roi_area", "double_value", [1.0, 2.5, 4.0], "fragment:roi_section"),
+    "roi_labor": ("ROI", "roi_labor", "double_value", [0.0, 500.0], "fragment:roi_section"),
+    "rot_curr": ("Rotation & Companion", "rot_curr", "string_value", ["Rice", "Wheat", "Maize"],
+                 "fragment:rotation_section"),
+}
+WARMUP = 3
+
+
+class Server:
+    """`streamlit run app.py` in a child process, collecting rerun_timing's log lines."""
+
+    def __init__(self, port, fragments, post_script_gc=True):
+        env = dict(os.environ, AGRIINTEL_RERUN_TIMING="1", AGRIINTEL_FRAGMENTS="1" if fragments else "0",
+                   AGRIINTEL_PRELOAD_PAGES="0", PYTHONUNBUFFERED="1")
+        cmd = [sys.executable, "-m", "streamlit", "run", os.path.join(HERE, "app.py"),
+               "--server.headless", "true", "--server.port", str(port),
+               "--browser.gatherUsageStats", "false"]
+        if not post_script_gc:
+            cmd += ["--runner.postScriptGC", "false"]
+        self.port = port
+        self.lines = []
+        self.process = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True)
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.lines.append(line.rstrip("\n"))
+
+    def wait_ready(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                if self.process.poll() is not None:
+                    break
+                time.sleep(0.2)
+        raise RuntimeError("Streamlit did not start:\n" + "\n".join(self.lines[-20:]))
+
+    def timings(self, name, since=0):
+        """Milliseconds logged by rerun_timing.record for `name` after line `since`."""
+        prefix = f"[rerun] {name}: "
+        return [float(line[len(prefix):-2]) for line in self.lines[since:] if line.startswith(prefix)]
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+class Session:
+    """Minimal browser stand-in: sends reruns with widget state and reads the reply."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.states = {}
+        self.widgets = {}  # widget key (or label) -> (widget id, fragment id)
+
+    async def rerun(self, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        deltas = nbytes = 0
+        while True:
+            data = await self.ws.recv()
+            nbytes += len(data)
+            forward = ForwardMsg.FromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                self._remember_widget(forward.delta)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start, deltas, nbytes
+
+    def _remember_widget(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        widget = getattr(element, element.WhichOneof("type"))
+        widget_id = getattr(widget, "id", "")
+        if widget_id:
+            # Keyed widget ids end in "-<key>"; others are found by label
+            self.widgets[widget_id.rsplit("-", 1)[-1]] = (widget_id, delta.fragment_id)
+            self.widgets.setdefault(getattr(widget, "label", ""), (widget_id, delta.fragment_id))
+
+    def set(self, key, field, value):
+        """Set a widget's value for the next rerun; returns its fragment id ("" if none)."""
+        widget_id, fragment_id = self.widgets[key]
+        state = WidgetState(id=widget_id)
+        setattr(state, field, value)
+        self.states[widget_id] = state
+        return fragment_id
+
+
+async def drive(server, scenario, reruns):
+    import websockets
+
+    page, key, field, values, fragment_name = SCENARIOS[scenario]
+    async with websockets.connect(f"ws://127.0.0.1:{server.port}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        # Like a browser: no Nagle delay on the small rerun messages
+        ws.transport.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = Session(ws)
+        await session.rerun()
+        session.set("Navigate", "string_value", page)
+        await session.rerun()
+        await session.rerun()
+
+        client, deltas, nbytes, since = [], [], [], None
+        for i in range(WARMUP + reruns):
+            if i == WARMUP:
+                since = len(server.lines)
+            fragment_id = session.set(key, field, values[i % len(values)])
+            seconds, n, size = await session.rerun(fragment_id)
+            if i >= WARMUP:
+                client.append(seconds * 1e3)
+                deltas.append(n)
+                nbytes.append(size)
+
+    await asyncio.sleep(0.2)  # let the last log lines arrive
+    app = server.timings(fragment_name if fragment_id else "script", since)
+    return {
+        "scenario": scenario, "fragment": bool(fragment_id), "reruns": reruns,
+        "client_ms": percentiles(client), "app_ms": percentiles(app),
+        "deltas": int(np.median(deltas)), "bytes": int(np.median(nbytes)),
+    }
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    return {"p50": float(np.percentile(samples, 50)), "p95": float(np.percentile(samples, 95))}
+
+
+def fmt(stat):
+    return "      -      " if stat is None else f"{stat['p50']:5.1f} / {stat['p95']:5.1f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time full-script vs fragment reruns of app.py")
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="repeatable (default: all)")
+    parser.add_argument("--port", type=int, default=8631)
+    parser.add_argument("--no-post-script-gc", action="store_true",
+                        help="run Streamlit with runner.postScriptGC=false")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<9} {'scenario':<9} {'client p50/p95 ms':>17} {'app p50/p95 ms':>15}  deltas  bytes")
+    for fragments in (False, True):
+        server = Server(args.port, fragments, post_script_gc=not args.no_post_script_gc)
+        try:
+            server.wait_ready()
+            for scenario in args.scenario or list(SCENARIOS):
+                result = asyncio.run(drive(server, scenario, args.reruns))
+                result["post_script_gc"] = not args.no_post_script_gc
+                results.append(result)
+                print(f"{'fragment' if result['fragment'] else 'full':<9} {scenario:<9} "
+                      f"{fmt(result['client_ms']):>17} {fmt(result['app_ms']):>15}  "
+                      f"{result['deltas']:6d} {result['bytes']:6d}")
+        finally:
+            server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
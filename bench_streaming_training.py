@@ -0,0 +1,87 @@
+"""
+Peak RSS and training time of train_crop_recommendation_model_streaming.py
+at growing dataset sizes.
+
+Datasets are generated with dataset_generator.py (Parquet when pyarrow is
+installed, else CSV) and kept in --data-dir for later runs. Each size trains
+in a fresh process, so its peak RSS is its own.
+
+    python bench_streaming_training.py --rows 1000000 10000000 50000000 --rounds 20
+    python bench_streaming_training.py --rows 1000000 10000000 50000000 --max-train-rows 2000000
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from dataset_generator import CROPS, write_dataset
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def dataset(data_dir, rows, seed=42):
+    samples_per_crop = math.ceil(rows / len(CROPS))
+    ext = "parquet" if importlib.util.find_spec("pyarrow") else "csv"
+    path = os.path.join(data_dir, f"crops_{samples_per_crop}x{len(CROPS)}_seed{seed}.{ext}")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        tmp = path + ".tmp"
+        if ext == "parquet":
+            write_dataset(csv_path=None, parquet_path=tmp, samples_per_crop=samples_per_crop, seed=seed)
+        else:
+            write_dataset(csv_path=tmp, samples_per_crop=samples_per_crop, seed=seed)
+        os.replace(tmp, path)
+        print(f"  generated {path} in {time.perf_counter() - start:.0f}s")
+    return path
+
+
+def run(path, rounds, chunk_rows, in_memory, max_train_rows=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "report.json")
+        cmd = [sys.executable, os.path.join(HERE, "train_crop_recommendation_model_streaming.py"),
+               "--data", path, "--out", os.path.join(tmp, "model.pkl"), "--rounds", str(rounds),
+               "--chunk-rows", str(chunk_rows), "--report-json", report_path]
+        if in_memory:
+            cmd.append("--in-memory")
+        if max_train_rows:
+            cmd += ["--max-train-rows", str(max_train_rows)]
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+        report["wall_seconds"] = time.perf_counter() - start
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark out-of-core training at several dataset sizes")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--in-memory", action="store_true", help="QuantileDMatrix instead of external memory")
+    parser.add_argument("--max-train-rows", type=int, default=None, help="passed to the training script")
+    parser.add_argument("--data-dir", default=os.path.join(HERE, "cache", "bench_datasets"))
+    parser.add_argument("--json", help="also write all reports to this file")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    reports = []
+    for rows in args.rows:
+        print(f"{rows:,} rows")
+        report = run(dataset(args.data_dir, rows), args.rounds, args.chunk_rows, args.in_memory,
+                     args.max_train_rows)
+        reports.append(report)
+        print(f"  trained on {report['train_rows']:,} rows, peak RSS {report['peak_rss_mb']:7.0f} MB, "
+              f"wall {report['wall_seconds']:7.1f}s "
+              f"(preprocess {report['preprocess_seconds']:.1f}s, matrix {report['matrix_seconds']:.1f}s, "
+              f"boosting {report['train_seconds']:.1f}s, evaluate {report['evaluate_seconds']:.1f}s)  "
+              f"test accuracy {report['test_accuracy'] * 100:.2f}%")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
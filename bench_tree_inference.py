@@ -0,0 +1,80 @@
+"""
+Latency benchmark: XGBoost model.predict vs the compiled NumPy forest.
+
+    python bench_tree_inference.py --rows 500 --batch 2000
+"""
+import argparse
+import pickle
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from tree_compiler import compile_xgboost
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1e6
+    return f"p50={np.percentile(samples, 50):8.1f}us  p99={np.percentile(samples, 99):8.1f}us"
+
+
+def time_single_rows(predict, X):
+    samples = []
+    for row in X:
+        row = row[None, :]
+        start = time.perf_counter()
+        predict(row)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench(name, model, X, batch):
+    start = time.perf_counter()
+    forest = compile_xgboost(model, probe=X[:256])
+    compile_time = time.perf_counter() - start
+
+    agree = np.mean(model.predict(X) == forest.predict(X))
+    print(f"\n{name}: {len(forest.roots)} trees, depth {forest.max_depth}, "
+          f"compiled in {compile_time:.2f}s, label agreement {agree * 100:.2f}%")
+
+    print(f"  single row  xgboost : {percentiles(time_single_rows(model.predict, X))}")
+    print(f"  single row  compiled: {percentiles(time_single_rows(forest.predict, X))}")
+
+    big = X[np.random.default_rng(0).integers(0, len(X), batch)]
+    for label, predict in (("xgboost ", model.predict), ("compiled", forest.predict)):
+        start = time.perf_counter()
+        predict(big)
+        elapsed = time.perf_counter() - start
+        print(f"  batch {batch:>6} {label}: {elapsed * 1e3:8.1f}ms ({batch / elapsed:,.0f} rows/s)")
+
+
+def crop_features(rows):
+    data = joblib.load("models/crop_recommendation_model.pkl")
+    df = pd.read_csv("datasets/Crop_recommendation.csv").sample(rows, random_state=0)
+    df["Soil_encoded"] = data["soil_encoder"].transform(df["soil"])
+    X = data["scaler"].transform(df[["N", "P", "K", "temperature", "humidity", "ph", "rainfall", "Soil_encoded"]])
+    return data["model"], np.asarray(X)
+
+
+def water_features(rows):
+    with open("models/water_fertilizer_model.pkl", "rb") as f:
+        data = pickle.load(f)
+    df = pd.read_csv("datasets/crop_water_fertilizer_plan.csv").sample(rows, random_state=0)
+    X = np.column_stack([data["crop_encoder"].transform(df["Crop"]), df["N"], df["P"], df["K"], df["pH"]])
+    return data["model"], X
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500, help="single-row requests to time")
+    parser.add_argument("--batch", type=int, default=2000, help="rows in the batch test")
+    args = parser.parse_args()
+
+    for name, load in (("crop recommendation", crop_features), ("water & fertilizer", water_features)):
+        try:
+            model, X = load(args.rows)
+        except FileNotFoundError as e:
+            print(f"\n{name}: skipped ({e})")
+            continue
+        bench(name, model, X, args.batch)
@@ -0,0 +1,252 @@
+"""
+Bulk PDF reports for a whole programme of farms.
+
+Reads a CSV or JSONL of farm inputs, runs every analysis in batch
+(predict_crops, get_water_fertilizer_plans, companions and rotation once per
+distinct crop, ROI per row) and renders one PDF per farm, in that farm's
+language, across a process pool. PDFs are streamed into a directory or a
+ZIP as they finish; rows that fail are listed in failures.jsonl.
+
+Input columns:
+    required  N, P, K, ph, soil_type, city
+    optional  farmer_id (default: row number), lang (default: en),
+              crop (plan for this crop instead of the recommendation),
+              state, area, unit (default: Hectare), market_price (default: 10),
+              input_cost, irrigation_cost, labor_cost
+
+    python bulk_reports.py farms.csv --out reports.zip --workers 8
+    python bulk_reports.py farms.jsonl --out reports/ --weather-mode climatology --month 6
+"""
+import argparse
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from crop_companion import get_companion_crops
+from crop_rotation_planner import suggest_next_crop
+from predictor import predict_crops
+from report_builder import build_report_pdf
+from resources import get_resource
+from roi_calculator import compute_roi
+from water_fertilizer_plan import get_water_fertilizer_plans, plans_to_dicts
+
+REQUIRED_COLUMNS = ["N", "P", "K", "ph", "soil_type", "city"]
+
+
+def read_farms(path):
+    if path.endswith((".jsonl", ".ndjson")):
+        frame = pd.read_json(path, lines=True)
+    else:
+        frame = pd.read_csv(path)
+    frame.columns = frame.columns.str.strip()
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    if "farmer_id" not in frame.columns:
+        frame["farmer_id"] = [f"farm_{i + 1:06d}" for i in range(len(frame))]
+    if "lang" not in frame.columns:
+        frame["lang"] = "en"
+    return frame.reset_index(drop=True)
+
+
+def _cell(row, name, default=None):
+    value = row.get(name, default)
+    return default if value is None or (isinstance(value, float) and pd.isna(value)) else value
+
+
+# ======================
+# Analysis (batched)
+# ======================
+def analyse(frame, weather_mode=None, month=None):
+    """
+    Report data for every row (see report_builder.report_data), plus
+    per-stage error counts and timings in stats and one {"farmer_id",
+    "stage", "error"} entry per failed row and stage in stats["failures"].
+    A row whose crop could not be recommended is only listed for that stage.
+    """
+    stats = {"errors": {}, "seconds": {}, "failures": []}
+    farmer_ids = frame["farmer_id"].tolist()
+
+    def stage(name, start, failures):
+        stats["seconds"][name] = time.perf_counter() - start
+        stats["errors"][name] = len({i for i, _ in failures})
+        stats["failures"] += [{"farmer_id": farmer_ids[i], "stage": name, "error": str(e)} for i, e in failures]
+
+    start = time.perf_counter()
+    recommendations = predict_crops(frame[REQUIRED_COLUMNS], weather_mode, month)
+    stage("recommendation", start, [(i, e) for i, e in enumerate(recommendations["error"]) if e is not None])
+
+    start = time.perf_counter()
+    plan_crops = recommendations["crop"]
+    if "crop" in frame.columns:
+        plan_crops = frame["crop"].where(frame["crop"].notna(), plan_crops)
+    plan_input = pd.DataFrame({
+        "crop": plan_crops.fillna(""), "soil_N": frame["N"], "soil_P": frame["P"], "soil_K": frame["K"],
+        "ph": frame["ph"],
+    })
+    plans = plans_to_dicts(plan_input, get_water_fertilizer_plans(plan_input))
+    has_crop = plan_crops.notna().tolist()
+    stage("plan", start, [(i, p["error"]) for i, p in enumerate(plans) if "error" in p and has_crop[i]])
+
+    start = time.perf_counter()
+    unique = [c for c in plan_crops.dropna().unique()]
+    companions = {c: get_companion_crops(str(c)) for c in unique}
+    rotations = {c: suggest_next_crop(str(c)) for c in unique}
+    stage("companion_rotation", start, [
+        (i, result["error"]) for i, crop in enumerate(plan_crops) if pd.notna(crop)
+        for result in (companions[crop], rotations[crop]) if "error" in result
+    ])
+
+    start = time.perf_counter()
+    yield_data = get_resource("yield_data")
+    roi, roi_failures = [], []
+    records = frame.to_dict("records")
+    for i, (row, crop) in enumerate(zip(records, plan_crops)):
+        if _cell(row, "state") is None or _cell(row, "area") is None or pd.isna(crop):
+            roi.append({})
+            continue
+        try:
+            roi.append(compute_roi(
+                float(row["area"]), _cell(row, "unit", "Hectare"), row["state"], crop,
+                float(_cell(row, "market_price", 10.0)), float(_cell(row, "input_cost", 0.0)),
+                float(_cell(row, "irrigation_cost", 0.0)), float(_cell(row, "labor_cost", 0.0)), yield_data,
+            ))
+        except (KeyError, ValueError) as e:
+            roi.append({})
+            roi_failures.append((i, f"{type(e).__name__}: {e}"))
+    stage("roi", start, roi_failures)
+
+    data = []
+    for i, crop in enumerate(plan_crops):
+        recommended = recommendations.at[i, "crop"]
+        data.append({
+            "recommended_crop": recommended if recommended is not None else recommendations.at[i, "error"],
+            "water_plan": plans[i],
+            "companions": companions.get(crop, {}),
+            "rotation": rotations.get(crop, {}),
+            "roi": roi[i],
+        })
+    return data, stats
+
+
+# ======================
+# Rendering (process pool)
+# ======================
+def _init_worker():
+    get_resource("translations")
+
+
+def _render(task):
+    farmer_id, lang, data = task
+    try:
+        return farmer_id, build_report_pdf(data, lang), None
+    except Exception as e:
+        return farmer_id, None, f"{type(e).__name__}: {e}"
+
+
+class DirectorySink:
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def write(self, name, payload):
+        with open(os.path.join(self.path, name), "wb") as f:
+            f.write(payload)
+
+    def close(self):
+        pass
+
+
+class ZipSink:
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name, payload):
+        self.zip.writestr(name, payload)
+
+    def close(self):
+        self.zip.close()
+
+
+def _filename(farmer_id):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(farmer_id)) + ".pdf"
+
+
+def render_reports(tasks, sink, workers=None, window=4):
+    """
+    Render (farmer_id, lang, data) tasks across a process pool, writing each
+    PDF to `sink` as soon as it is ready. At most workers x window renders
+    are in flight, so memory stays flat however many rows there are.
+    """
+    workers = workers or os.cpu_count()
+    rendered, failures, size = 0, [], 0
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        pending = set()
+        while True:
+            for task in tasks:
+                pending.add(pool.submit(_render, task))
+                if len(pending) >= workers * window:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                farmer_id, pdf, error = future.result()
+                if error is not None:
+                    failures.append({"farmer_id": farmer_id, "stage": "render", "error": error})
+                    continue
+                sink.write(_filename(farmer_id), pdf)
+                rendered += 1
+                size += len(pdf)
+    return rendered, failures, size
+
+
+def run(input_path, out, workers=None, weather_mode=None, month=None):
+    start = time.perf_counter()
+    frame = read_farms(input_path)
+    known = set(get_resource("translations"))
+    unknown_lang = int((~frame["lang"].isin(known)).sum())
+
+    data, stats = analyse(frame, weather_mode, month)
+    tasks = [(row.farmer_id, row.lang if row.lang in known else "en", d)
+             for row, d in zip(frame.itertuples(index=False), data)]
+
+    render_start = time.perf_counter()
+    sink = ZipSink(out) if out.endswith(".zip") else DirectorySink(out)
+    try:
+        rendered, failures, size = render_reports(tasks, sink, workers)
+        failures = stats.pop("failures") + failures
+        sink.write("failures.jsonl", "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in failures).encode())
+    finally:
+        sink.close()
+    stats["seconds"]["render"] = time.perf_counter() - render_start
+
+    elapsed = time.perf_counter() - start
+    stats.update(rows=len(frame), rendered=rendered, render_failures=sum(f["stage"] == "render" for f in failures),
+                 unknown_language=unknown_lang, bytes=size, seconds_total=elapsed,
+                 reports_per_second=rendered / stats["seconds"]["render"] if rendered else 0.0)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render PDF reports for every farm in a CSV/JSONL file")
+    parser.add_argument("input", help="CSV or JSONL of farm inputs")
+    parser.add_argument("--out", required=True, help="output directory, or a .zip file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--weather-mode", choices=["live", "climatology", "blend"], default=None)
+    parser.add_argument("--month", type=int, default=None, help="season start month for climatology modes")
+    args = parser.parse_args()
+
+    stats = run(args.input, args.out, args.workers, args.weather_mode, args.month)
+    print(f"{stats['rendered']:,}/{stats['rows']:,} reports in {stats['seconds_total']:.1f}s "
+          f"({stats['reports_per_second']:.1f} PDFs/s, {stats['bytes'] / 1e6:.1f} MB) -> {args.out}")
+    print(f"Render failures: {stats['render_failures']}, rows with unknown language: {stats['unknown_language']}")
+    for name, seconds in stats["seconds"].items():
+        errors = stats["errors"].get(name)
+        print(f"  {name:<20} {seconds:7.2f}s" + (f"  {errors} rows with errors" if errors is not None else ""))
@@ -0,0 +1,127 @@
+"""
+Offline per-city monthly climate normals.
+
+The crop model was trained on seasonal rainfall (hundreds to thousands of mm),
+while live weather only gives the last hour's rain. This store holds monthly
+normals of temperature, humidity and rainfall per city, built once from a CSV
+and memory-mapped, so predictions can run fully offline.
+
+CSV columns: city, month (1-12), temperature (deg C), humidity (%),
+rainfall (mm, monthly total). An optional state column is ignored.
+
+    python climatology.py build city_monthly_normals.csv
+    python climatology.py show Pune --month 7
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from weather_cache import normalize_city
+
+CLIMATOLOGY_DIR = os.environ.get(
+    "AGRIINTEL_CLIMATOLOGY_DIR", os.path.join(os.path.dirname(__file__), "models", "climatology")
+)
+# Months of rainfall summed into the "seasonal" rainfall feature, starting at the query month
+SEASON_MONTHS = int(os.environ.get("AGRIINTEL_SEASON_MONTHS", 4))
+
+TEMPERATURE, HUMIDITY, RAINFALL = range(3)
+
+
+class ClimatologyError(Exception):
+    """Raised when no normals are available for a city."""
+
+
+class ClimatologyStore:
+    """Memory-mapped (cities, 12 months, 3 variables) float32 array plus a city index."""
+
+    def __init__(self, directory=CLIMATOLOGY_DIR):
+        with open(os.path.join(directory, "cities.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.index = meta["index"]
+        self.names = meta["names"]
+        self.normals = np.load(os.path.join(directory, "normals.npy"), mmap_mode="r")
+
+    def __contains__(self, city):
+        return normalize_city(city) in self.index
+
+    def _row(self, city):
+        try:
+            return self.normals[self.index[normalize_city(city)]]
+        except KeyError:
+            raise ClimatologyError(f"No climate normals for city '{city}'")
+
+    def monthly(self, city, month):
+        """(temperature, humidity, rainfall) normals for one calendar month."""
+        temperature, humidity, rainfall = self._row(city)[int(month) - 1]
+        return float(temperature), float(humidity), float(rainfall)
+
+    def seasonal(self, city, month=None, months=SEASON_MONTHS):
+        """
+        Model-ready weather features for a season starting in `month`
+        (default: current month): mean temperature and humidity, total rainfall.
+        """
+        month = month or time.localtime().tm_mon
+        window = self._row(city).take(np.arange(month - 1, month - 1 + months), axis=0, mode="wrap")
+        return (
+            float(window[:, TEMPERATURE].mean()),
+            float(window[:, HUMIDITY].mean()),
+            float(window[:, RAINFALL].sum()),
+        )
+
+
+def build_store(csv_path, directory=CLIMATOLOGY_DIR):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip().str.lower()
+    required = ["city", "month", "temperature", "humidity", "rainfall"]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"CSV missing required columns: {missing}")
+
+    df["key"] = df["city"].map(normalize_city)
+    df["month"] = df["month"].astype(int)
+    if not df["month"].between(1, 12).all():
+        raise ValueError("month must be 1-12")
+
+    keys = sorted(df["key"].unique())
+    index = {key: i for i, key in enumerate(keys)}
+    names = df.drop_duplicates("key").set_index("key")["city"].reindex(keys).tolist()
+
+    normals = np.full((len(keys), 12, 3), np.nan, dtype=np.float32)
+    normals[df["key"].map(index).to_numpy(), df["month"].to_numpy() - 1] = (
+        df[["temperature", "humidity", "rainfall"]].to_numpy(dtype=np.float32)
+    )
+    incomplete = [names[i] for i in np.flatnonzero(np.isnan(normals).any(axis=(1, 2)))]
+    if incomplete:
+        raise ValueError(f"{len(incomplete)} cities lack all 12 months, e.g. {incomplete[:5]}")
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "normals.npy"), normals)
+    with open(os.path.join(directory, "cities.json"), "w", encoding="utf-8") as f:
+        json.dump({"index": index, "names": names, "source": os.path.basename(csv_path)}, f)
+    print(f"Climatology store for {len(keys)} cities written to {directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the climatology store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("csv")
+    build.add_argument("--out", default=CLIMATOLOGY_DIR)
+    show = sub.add_parser("show")
+    show.add_argument("city")
+    show.add_argument("--month", type=int, default=None)
+    show.add_argument("--dir", default=CLIMATOLOGY_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_store(args.csv, args.out)
+    else:
+        store = ClimatologyStore(args.dir)
+        month = args.month or time.localtime().tm_mon
+        print(f"{args.city}, month {month}: monthly normals {store.monthly(args.city, month)}")
+        print(f"Season of {SEASON_MONTHS} months: {store.seasonal(args.city, month)}")
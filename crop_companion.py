@@ -1,23 +1,31 @@
+import os
 import pandas as pd
+from resources import get_resource
 
-COMPANION_PATH = "datasets/crop_companion.csv"
+COMPANION_PATH = os.path.join(os.path.dirname(__file__), "datasets", "crop_companion.csv")
 
-def load_companion_data():
+def read_companion_data(path=COMPANION_PATH):
+    """Parse the companion CSV; errors propagate (the resource registry retries on the next call)."""
+    # Use sep=";" because your CSV uses semicolons
+    df = pd.read_csv(path, sep=";")
+    # Normalize column names
+    df.columns = df.columns.str.strip().str.lower()
+    # Strip spaces in the crop names column
+    df["crop"] = df["crop"].astype(str).str.strip().str.lower()
+    return df
+
+def load_companion_data(path=COMPANION_PATH):
     try:
-        # Use sep=";" because your CSV uses semicolons
-        df = pd.read_csv(COMPANION_PATH, sep=";")
-        # Normalize column names
-        df.columns = df.columns.str.strip().str.lower()
-        # Strip spaces in the crop names column
-        df["crop"] = df["crop"].astype(str).str.strip().str.lower()
-        return df
+        return read_companion_data(path)
     except Exception as e:
         print("Error loading CSV:", e)
         return None
 
 def get_companion_crops(crop_name):
-    df = load_companion_data()
-    if df is None:
+    # Parsed once per process by the resource registry, reloaded if the CSV changes
+    try:
+        df = get_resource("crop_companion")
+    except Exception:
         return {"error": "Could not load crop companion data."}
 
     if "crop" not in df.columns or "companions" not in df.columns:
@@ -1,4 +1,5 @@
 import pandas as pd
+from resources import get_resource
 
 # ======================
 # 🌱 Realistic Crop Rotation Rules (Only from your list)
@@ -329,10 +330,12 @@ def suggest_next_crop(curr_crop: str):
     """
     Suggests next crops and notes based on crop rotation rules.
     """
-    if curr_crop not in rotation_rules:
+    # The rules below, as served by the resource registry (re-read if this file is edited)
+    rules = get_resource("rotation_rules")
+    if curr_crop not in rules:
         return {"error": f"No rotation data available for crop '{curr_crop}'"}
 
-    data = rotation_rules[curr_crop]
+    data = rules[curr_crop]
 
     # If the data is a list, wrap it for consistent output
     if isinstance(data, list):
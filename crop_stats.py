@@ -0,0 +1,180 @@
+"""
+Offline per-crop NPK/pH statistics for the water & fertilizer planner.
+
+crop_water_fertilizer_plan.csv holds ~100 NPK/pH/irrigation variants per
+crop. build_stats() summarizes them once into a compact .npz table (one row
+per crop, no pickles): first row, mean, median, 25th/75th percentiles and a
+mean per irrigation type. The table records the CSV's sha256, so
+ensure_stats() only rebuilds when the CSV actually changed.
+
+    python crop_stats.py build          # no-op if the CSV is unchanged
+    python crop_stats.py build --force
+    python crop_stats.py show Rice
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+from cache_utils import file_sha256
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "datasets", "crop_water_fertilizer_plan.csv")
+STATS_PATH = os.environ.get(
+    "AGRIINTEL_CROP_STATS", os.path.join(os.path.dirname(__file__), "models", "crop_stats.npz")
+)
+
+# Statistics the planner can serve. "first" is the first CSV row (the old behaviour);
+# "irrigation" is the mean over rows with the predicted irrigation type.
+STATISTICS = ("first", "mean", "median", "q25", "q75", "irrigation")
+NPK_STATISTIC = os.environ.get("AGRIINTEL_NPK_STATISTIC", "median")
+
+VARIABLES = ["N", "P", "K", "pH"]
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_crop(name) -> str:
+    return str(name).strip().lower()
+
+
+# ======================
+# Lookup
+# ======================
+class CropStatsTable:
+    """
+    Per-crop summary arrays loaded from a built table.
+
+    values[statistic] has shape (crops, 4) for N, P, K, pH; by_irrigation has
+    shape (crops, irrigation types, 4), NaN where a crop never uses a type.
+    """
+
+    def __init__(self, path=STATS_PATH):
+        with np.load(path) as f:
+            self.source_sha256 = str(f["source_sha256"])
+            self.names = f["names"].tolist()
+            self.notes = f["notes"].tolist()
+            self.irrigations = f["irrigations"].tolist()
+            self.counts = f["counts"]
+            self.values = {name: f[name] for name in STATISTICS if name != "irrigation"}
+            self.by_irrigation = f["by_irrigation"]
+        self.index = {normalize_crop(name): i for i, name in enumerate(self.names)}
+        self.irrigation_index = {name: i for i, name in enumerate(self.irrigations)}
+
+    def lookup(self, crop_name):
+        """Crop position in the summary arrays, or None if unknown."""
+        return self.index.get(normalize_crop(crop_name))
+
+    def npk_for(self, crop_index, irrigation=None, statistic=NPK_STATISTIC):
+        """
+        N/P/K rows for an array of crop positions. For "irrigation", pass the
+        predicted irrigation type per row; crops that never use that type (or
+        rows without one) fall back to the median.
+        """
+        crop_index = np.asarray(crop_index, dtype=int)
+        median = self.values["median"][crop_index, :3]
+        if statistic != "irrigation":
+            values = self.values[statistic][crop_index, :3]
+        elif irrigation is None:
+            values = median
+        else:
+            types = np.array([self.irrigation_index.get(t, -1) for t in np.atleast_1d(irrigation)])
+            values = self.by_irrigation[crop_index, np.maximum(types, 0), :3]
+            values[types < 0] = np.nan
+            values = np.where(np.isnan(values), median, values)
+        # Stored as float32; serve the CSV's 2-decimal precision
+        return np.round(values.astype(float), 2)
+
+
+# ======================
+# Build
+# ======================
+def build_stats(csv_path=DATA_PATH, out_path=STATS_PATH, force=False):
+    """
+    Summarize the CSV into `out_path`. Skipped (returns False) when the table
+    already exists for a CSV with the same sha256, unless `force` is set.
+    """
+    import pandas as pd
+
+    digest = file_sha256(csv_path)
+    if not force and os.path.exists(out_path):
+        try:
+            with np.load(out_path) as f:
+                if str(f["source_sha256"]) == digest:
+                    return False
+        except (OSError, KeyError, ValueError):
+            pass  # unreadable table: rebuild it
+
+    df = pd.read_csv(csv_path)
+    df["key"] = df["Crop"].map(normalize_crop)
+    groups = df.groupby("key", sort=True)
+    values = groups[VARIABLES]
+
+    first = groups.first()
+    irrigations = sorted(df["Irrigation"].dropna().unique())
+    by_irrigation = (
+        df.groupby(["key", "Irrigation"])[VARIABLES].mean()
+        .reindex(pd.MultiIndex.from_product([first.index, irrigations]))
+        .to_numpy(dtype=np.float32)
+        .reshape(len(first), len(irrigations), len(VARIABLES))
+    )
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        source_sha256=np.array(digest),
+        names=first["Crop"].to_numpy(dtype=str),
+        notes=first["Notes"].fillna("").to_numpy(dtype=str),
+        irrigations=np.array(irrigations, dtype=str),
+        counts=groups.size().to_numpy(dtype=np.int32),
+        first=first[VARIABLES].to_numpy(dtype=np.float32),
+        mean=values.mean().to_numpy(dtype=np.float32),
+        median=values.median().to_numpy(dtype=np.float32),
+        q25=values.quantile(0.25).to_numpy(dtype=np.float32),
+        q75=values.quantile(0.75).to_numpy(dtype=np.float32),
+        by_irrigation=by_irrigation,
+    )
+    os.replace(tmp_path, out_path)
+    return True
+
+
+def ensure_stats(csv_path=DATA_PATH, out_path=STATS_PATH):
+    """Build the table if missing or stale, then load it."""
+    # Checked on first use, not at import: a bad setting fails the planner, not the app
+    if NPK_STATISTIC not in STATISTICS:
+        raise ValueError(f"AGRIINTEL_NPK_STATISTIC must be one of {STATISTICS}, got '{NPK_STATISTIC}'")
+    if build_stats(csv_path, out_path):
+        logger.info("Rebuilt crop statistics table at %s", out_path)
+    return CropStatsTable(out_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the per-crop NPK statistics table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--csv", default=DATA_PATH)
+    build.add_argument("--out", default=STATS_PATH)
+    build.add_argument("--force", action="store_true")
+    show = sub.add_parser("show")
+    show.add_argument("crop")
+    show.add_argument("--path", default=STATS_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        built = build_stats(args.csv, args.out, args.force)
+        status = "built" if built else "up to date (CSV hash unchanged)"
+        print(f"{args.out}: {status} in {time.perf_counter() - start:.3f}s")
+    else:
+        table = CropStatsTable(args.path)
+        i = table.lookup(args.crop)
+        if i is None:
+            raise SystemExit(f"Unknown crop '{args.crop}'")
+        print(f"{table.names[i]} ({table.counts[i]} rows), N / P / K / pH")
+        for name, values in table.values.items():
+            print(f"  {name:<8} " + "  ".join(f"{v:7.2f}" for v in values[i]))
+        for j, irrigation in enumerate(table.irrigations):
+            if not np.isnan(table.by_irrigation[i, j, 0]):
+                print(f"  {irrigation:<30} " + "  ".join(f"{v:7.2f}" for v in table.by_irrigation[i, j]))
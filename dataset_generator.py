@@ -1,5 +1,22 @@
+"""
+Synthetic crop recommendation dataset (datasets/Crop_recommendation.csv).
+
+Every crop gets `samples_per_crop` rows drawn uniformly from its ranges in
+crop_conditions, with the soil picked uniformly from its soil list. Rows are
+generated with NumPy in chunks from a seeded generator and streamed to CSV
+and, if pyarrow is installed, Parquet, so the full dataset is never held in
+memory. Output is identical for the same seed, samples_per_crop and
+chunk_rows.
+
+    python dataset_generator.py
+    python dataset_generator.py --samples-per-crop 200000 --parquet datasets/crop_stress.parquet --csv ""
+"""
+import argparse
+import os
+import time
+
+import numpy as np
 import pandas as pd
-import random
 
 #Define the soil types
 soil_types = ["Loamy", "Clay", "Sandy", "Black", "Red", "Alluvial", "Laterite"]
@@ -86,27 +103,82 @@ crop_conditions = {
     "Wheat":        {"N": (60,120), "P": (40, 70), "K": (50,100), "temp": (10, 25), "hum": (50, 75), "ph": (6.0, 7.5), "rain": (300, 900), "soil": ["Loamy", "Clay","Black","Alluvial"]},
 }
 
-# Generate synthetic data
-rows = []
-samples_per_crop = 700  # you can change to 100, 500, etc.
+# -------------------------
+# Vectorized generation
+# -------------------------
+CSV_PATH = os.path.join(os.path.dirname(__file__), "datasets", "Crop_recommendation.csv")
+COLUMNS = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall", "soil", "label"]
+# Output column -> key in crop_conditions
+RANGE_KEYS = {"N": "N", "P": "P", "K": "K", "temperature": "temp", "humidity": "hum", "ph": "ph", "rainfall": "rain"}
+CHUNK_ROWS = 1_000_000
 
-for crop, vals in crop_conditions.items():
-    for _ in range(samples_per_crop):
-        N = random.uniform(*vals["N"])
-        P = random.uniform(*vals["P"])
-        K = random.uniform(*vals["K"])
-        temperature = random.uniform(*vals["temp"])
-        humidity = random.uniform(*vals["hum"])
-        ph = random.uniform(*vals["ph"])
-        rainfall = random.uniform(*vals["rain"])
-        soil = random.choice(vals["soil"])  # randomly pick one soil type for the sample
+CROPS = np.array(list(crop_conditions), dtype=object)
+# (crops,) low and high arrays per output column
+RANGE_LOW = {col: np.array([c[key][0] for c in crop_conditions.values()], dtype=float) for col, key in RANGE_KEYS.items()}
+RANGE_HIGH = {col: np.array([c[key][1] for c in crop_conditions.values()], dtype=float) for col, key in RANGE_KEYS.items()}
+# (crops, max soils) soil names, padded; names are kept as written (some have a trailing space)
+SOIL_COUNT = np.array([len(c["soil"]) for c in crop_conditions.values()])
+SOIL_TABLE = np.array([c["soil"] + [""] * (SOIL_COUNT.max() - len(c["soil"])) for c in crop_conditions.values()],
+                      dtype=object)
 
-        rows.append([N, P, K, temperature, humidity, ph, rainfall, soil, crop])
 
-# -------------------------
-# Save dataset
-# -------------------------
-df = pd.DataFrame(rows, columns=["N", "P", "K", "temperature", "humidity", "ph", "rainfall", "soil", "label"])
-df.to_csv("datasets/Crop_recommendation.csv", index=False)
+def generate_chunks(samples_per_crop=700, seed=42, chunk_rows=CHUNK_ROWS):
+    """Yield the dataset as DataFrames of at most chunk_rows rows, crop by crop."""
+    rng = np.random.default_rng(seed)
+    total = len(CROPS) * samples_per_crop
+    for start in range(0, total, chunk_rows):
+        crop = np.arange(start, min(start + chunk_rows, total)) // samples_per_crop
+        chunk = {}
+        for col in RANGE_KEYS:
+            low = RANGE_LOW[col][crop]
+            chunk[col] = low + (RANGE_HIGH[col][crop] - low) * rng.random(len(crop))
+        soil_index = (rng.random(len(crop)) * SOIL_COUNT[crop]).astype(np.intp)
+        chunk["soil"] = SOIL_TABLE[crop, soil_index]
+        chunk["label"] = CROPS[crop]
+        yield pd.DataFrame(chunk, columns=COLUMNS)
+
+
+def write_dataset(csv_path=CSV_PATH, parquet_path=None, samples_per_crop=700, seed=42, chunk_rows=CHUNK_ROWS):
+    """Stream the dataset to csv_path and/or parquet_path. Returns the number of rows written."""
+    writer = None
+    if parquet_path:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    rows = 0
+    try:
+        for i, chunk in enumerate(generate_chunks(samples_per_crop, seed, chunk_rows)):
+            if csv_path:
+                chunk.to_csv(csv_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            if parquet_path:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(parquet_path, table.schema, compression="zstd")
+                writer.write_table(table)  # one row group per chunk
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic crop recommendation dataset")
+    parser.add_argument("--samples-per-crop", type=int, default=700)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--csv", default=CSV_PATH, help='CSV output ("" to skip)')
+    parser.add_argument("--parquet", default=None, help="Parquet output (needs pyarrow)")
+    args = parser.parse_args()
+
+    if args.parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("--parquet needs pyarrow: pip install pyarrow")
 
-print(f" Dataset generated successfully with {len(df)} samples and saved to 'datasets/Crop_recommendation.csv'")
\ No newline at end of file
+    start = time.perf_counter()
+    rows = write_dataset(args.csv, args.parquet, args.samples_per_crop, args.seed, args.chunk_rows)
+    outputs = " and ".join(f"'{p}'" for p in (args.csv, args.parquet) if p)
+    print(f" Dataset generated successfully with {rows} samples in {time.perf_counter() - start:.1f}s "
+          f"and saved to {outputs}")
@@ -0,0 +1,106 @@
+"""
+Local stand-in for the OpenWeatherMap current-weather endpoint.
+
+Simulates latency and 5xx errors so WeatherClient timeouts, retries and the
+circuit breaker can be exercised without the real provider:
+
+    python fake_weather_server.py --port 8765 --latency 0.2 --error-rate 0.3
+    AGRIINTEL_WEATHER_URL=http://127.0.0.1:8765/data/2.5/weather streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WEATHER_PATH = "/data/2.5/weather"
+
+
+def fake_reading(city: str) -> dict:
+    """Deterministic pseudo-weather for a city name."""
+    seed = zlib.crc32(city.strip().lower().encode("utf-8"))
+    rng = random.Random(seed)
+    return {
+        "cod": 200,
+        "name": city,
+        "main": {"temp": round(rng.uniform(12, 38), 2), "humidity": rng.randint(30, 95)},
+        "rain": {"1h": round(rng.choice([0, 0, 0, rng.uniform(0, 12)]), 2)},
+    }
+
+
+class FakeWeatherHandler(BaseHTTPRequestHandler):
+    # Set on the server instance by make_server()
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.stats["requests"] += 1
+
+        if server.latency:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        url = urlparse(self.path)
+        city = parse_qs(url.query).get("q", [""])[0]
+
+        if server.down or random.random() < server.error_rate:
+            with server.stats_lock:
+                server.stats["errors"] += 1
+            self._send(503, {"cod": 503, "message": "simulated upstream failure"})
+        elif url.path != WEATHER_PATH or not city:
+            self._send(404, {"cod": "404", "message": "city not found"})
+        else:
+            self._send(200, fake_reading(city))
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (e.g. read timeout) before we answered
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0):
+    server = ThreadingHTTPServer((host, port), FakeWeatherHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.down = False
+    server.stats = {"requests": 0, "errors": 0}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def start_fake_server(**kwargs):
+    """Run a fake server on a background thread. Returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}{WEATHER_PATH}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenWeatherMap server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    srv = make_server(args.host, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Fake weather server on http://{args.host}:{args.port}{WEATHER_PATH}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
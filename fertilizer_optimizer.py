@@ -0,0 +1,163 @@
+"""
+Least-cost fertilizer mix for the planner's nutrient gaps.
+
+Gaps from water_fertilizer_plan are read as kg/ha of N, P2O5 and K2O (the
+soil health card convention). For each field we solve
+
+    minimize  price . x   subject to  A x >= gap,  x >= 0
+
+where x is kg/ha of each product and A holds the products' nutrient
+fractions. With three constraints an optimum always sits on a basis of
+three columns of [A | -I] (products plus surplus variables), so every basis
+is inverted once up front and all fields are solved together: one batched
+matrix product per chunk, a feasibility mask and an argmin over bases. No
+per-field solver calls.
+
+The product catalog is configurable: a JSON list of
+{"name", "N", "P", "K" (percent), "bag_kg", "bag_price"} entries, passed in
+or read from AGRIINTEL_FERTILIZER_CATALOG.
+"""
+import itertools
+import json
+import os
+
+import numpy as np
+
+# Indicative bag sizes and prices (INR); override with a catalog file for real prices
+DEFAULT_CATALOG = [
+    {"name": "Urea", "N": 46, "P": 0, "K": 0, "bag_kg": 45, "bag_price": 266.5},
+    {"name": "DAP", "N": 18, "P": 46, "K": 0, "bag_kg": 50, "bag_price": 1350},
+    {"name": "MOP", "N": 0, "P": 0, "K": 60, "bag_kg": 50, "bag_price": 1700},
+    {"name": "SSP", "N": 0, "P": 16, "K": 0, "bag_kg": 50, "bag_price": 500},
+    {"name": "NPK 10:26:26", "N": 10, "P": 26, "K": 26, "bag_kg": 50, "bag_price": 1470},
+    {"name": "NPK 12:32:16", "N": 12, "P": 32, "K": 16, "bag_kg": 50, "bag_price": 1450},
+]
+CATALOG_PATH = os.environ.get("AGRIINTEL_FERTILIZER_CATALOG")
+
+# Fields solved per batched product; bounds memory at bases x 3 x chunk floats
+CHUNK_FIELDS = 20_000
+_FEASIBILITY_TOL = 1e-9
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Catalog from a JSON file, or the built-in default."""
+    if not path:
+        return DEFAULT_CATALOG
+    with open(path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    for product in catalog:
+        missing = [k for k in ("name", "N", "P", "K", "bag_kg", "bag_price") if k not in product]
+        if missing:
+            raise ValueError(f"Catalog entry {product.get('name', product)} missing {missing}")
+    return catalog
+
+
+class FertilizerOptimizer:
+    """Least-cost mixes for a fixed product catalog, solved in batches."""
+
+    def __init__(self, catalog=None):
+        self.catalog = load_catalog() if catalog is None else catalog
+        self.names = [p["name"] for p in self.catalog]
+        # Nutrient fraction per kg of product, shape (3, products)
+        self.content = np.array([[p[n] / 100 for p in self.catalog] for n in ("N", "P", "K")], dtype=float)
+        self.bag_kg = np.array([p["bag_kg"] for p in self.catalog], dtype=float)
+        self.price_per_kg = np.array([p["bag_price"] for p in self.catalog], dtype=float) / self.bag_kg
+
+        # Every invertible 3-column basis of [A | -I]; surplus columns cost nothing
+        columns = np.hstack([self.content, -np.eye(3)])
+        costs = np.r_[self.price_per_kg, np.zeros(3)]
+        bases = np.array(list(itertools.combinations(range(columns.shape[1]), 3)))
+        matrices = columns[:, bases].transpose(1, 0, 2)
+        invertible = np.abs(np.linalg.det(matrices)) > 1e-12
+        self.bases = bases[invertible]
+        self.inverses = np.linalg.solve(matrices[invertible], np.broadcast_to(np.eye(3), matrices[invertible].shape))
+        self.basis_costs = costs[self.bases]
+        self.n_products = len(self.catalog)
+
+    def solve(self, gaps):
+        """
+        kg/ha of each product for an (fields, 3) array of N/P/K gaps.
+
+        Returns (kg, feasible): kg has shape (fields, products); rows that no
+        mix can cover (or with NaN gaps) are all-NaN with feasible False.
+        """
+        gaps = np.atleast_2d(np.asarray(gaps, dtype=float))
+        kg = np.full((len(gaps), self.n_products), np.nan)
+        feasible = np.zeros(len(gaps), dtype=bool)
+        for start in range(0, len(gaps), CHUNK_FIELDS):
+            chunk = gaps[start:start + CHUNK_FIELDS]
+            valid = ~np.isnan(chunk).any(axis=1)
+            g = np.where(valid[:, None], np.maximum(chunk, 0), 0)
+
+            # Basic solution of every basis for every field: (bases, 3, fields)
+            solution = self.inverses @ g.T
+            ok = (solution >= -_FEASIBILITY_TOL).all(axis=1)
+            cost = np.where(ok, np.einsum("bk,bkf->bf", self.basis_costs, solution), np.inf)
+            best = np.argmin(cost, axis=0)
+            fields = np.arange(len(g))
+            found = np.isfinite(cost[best, fields]) & valid
+
+            values = np.clip(solution[best, :, fields], 0, None)  # (fields, 3)
+            columns = self.bases[best]
+            out = np.zeros((len(g), self.n_products + 3))
+            np.put_along_axis(out, columns, values, axis=1)
+            out = out[:, :self.n_products]
+            out[~found] = np.nan
+            kg[start:start + len(g)] = out
+            feasible[start:start + len(g)] = found
+        return kg, feasible
+
+    def optimize(self, gaps, area_ha=1.0):
+        """
+        Batched plan: kg/ha, whole bags for `area_ha` (scalar or per field),
+        cost of those bags and the nutrients they actually supply (kg/ha).
+        """
+        kg, feasible = self.solve(gaps)
+        area = np.broadcast_to(np.asarray(area_ha, dtype=float), (len(kg),))[:, None]
+        # Round up the field's total, not the per-hectare rate
+        bags = np.ceil(np.round(np.nan_to_num(kg) * area / self.bag_kg, 9)).astype(np.int64)
+        bag_cost = bags * self.bag_kg * self.price_per_kg
+        return {
+            "products": self.names,
+            "kg_per_ha": kg,
+            "bags": bags,
+            "cost": np.where(feasible, bag_cost.sum(axis=1), np.nan),
+            "lp_cost_per_ha": np.where(feasible, np.nan_to_num(kg) @ self.price_per_kg, np.nan),
+            "supplied": np.nan_to_num(kg) @ self.content.T,
+            "feasible": feasible,
+        }
+
+    def optimize_one(self, gap_N, gap_P, gap_K, area_ha=1.0):
+        """Mix for a single field as a dict, e.g. for the planner's nutrient_gaps."""
+        plan = self.optimize([[gap_N, gap_P, gap_K]], area_ha)
+        if not plan["feasible"][0]:
+            return {"error": "No product mix in the catalog covers these nutrient gaps"}
+        products = [
+            {"product": name, "kg_per_ha": round(float(kg), 2), "bags": int(bags),
+             "cost": round(float(bags * bag_kg * price), 2)}
+            for name, kg, bags, bag_kg, price in zip(
+                self.names, plan["kg_per_ha"][0], plan["bags"][0], self.bag_kg, self.price_per_kg)
+            if bags > 0
+        ]
+        return {"products": products, "total_cost": round(float(plan["cost"][0]), 2), "area_ha": area_ha}
+
+
+def optimize_plan_frame(plans, area_ha=1.0, optimizer=None):
+    """
+    Add kg/ha, bags and cost columns to the output of
+    water_fertilizer_plan.get_water_fertilizer_plans.
+    """
+    optimizer = optimizer or FertilizerOptimizer()
+    result = optimizer.optimize(plans[["gap_N", "gap_P", "gap_K"]].to_numpy(dtype=float), area_ha)
+    out = plans.copy()
+    for j, name in enumerate(optimizer.names):
+        out[f"{name} kg/ha"] = result["kg_per_ha"][:, j]
+        out[f"{name} bags"] = result["bags"][:, j]
+    out["fertilizer_cost"] = result["cost"]
+    return out
+
+
+# Quick test
+if __name__ == "__main__":
+    optimizer = FertilizerOptimizer()
+    print(optimizer.optimize_one(81.7, 51.85, 55.4, area_ha=2))
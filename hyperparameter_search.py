@@ -0,0 +1,280 @@
+"""
+Hyperparameter search for the crop recommendation model.
+
+Replaces the serial first-above-80% grid walk of
+train_crop_recommendation_model_accuracy_increase.py with successive halving:
+every configuration in SEARCH_SPACE is trained for a few boosting rounds,
+the best 1/ETA go on to a larger round budget, and so on up to MAX_ROUNDS.
+Each fit also early-stops on the validation split, so weak configurations
+are cheap at every rung. Fits run across a process pool with XGBoost
+threads split between workers.
+
+Selection uses a validation split carved out of the training data; the
+chosen configuration is then refit on the whole training split and scored
+once on the same held-out test split the training scripts use.
+
+Every finished fit is checkpointed to a JSON file, so an interrupted search
+picks up where it left off when run again with the same settings.
+
+    python hyperparameter_search.py --workers 4
+    python hyperparameter_search.py --candidates 40 --curve curve.csv
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from xgboost import XGBClassifier
+
+from cache_utils import file_sha256
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "datasets", "Crop_recommendation.csv")
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "models", "hyperparameter_search.json")
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "models", "crop_recommendation_model_best.pkl")
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'Soil_encoded']
+
+# The old grid without n_estimators, which is the budget successive halving allocates
+SEARCH_SPACE = {
+    "learning_rate": [0.05, 0.1, 0.2],
+    "max_depth": [6, 8, 10],
+    "subsample": [0.8, 1.0],
+    "colsample_bytree": [0.8, 1.0],
+    "gamma": [0, 0.1, 0.2, 0.3],
+}
+MAX_ROUNDS = 250   # largest n_estimators of the old grid
+MIN_ROUNDS = 25
+ETA = 3            # keep the best 1/ETA of each rung
+EARLY_STOPPING = 20
+CHECKPOINT_FORMAT = 1
+
+
+# ======================
+# Data
+# ======================
+def load_data(path=DATA_PATH):
+    """Encode, scale and split as the training scripts do; returns (splits, encoders)."""
+    data = pd.read_csv(path)
+    if "soil" not in data.columns:
+        raise ValueError("'Soil' column not found in dataset! Please add it before training.")
+
+    soil_encoder = LabelEncoder()
+    data["Soil_encoded"] = soil_encoder.fit_transform(data["soil"])
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(data["label"])
+    scaler = StandardScaler()
+    X = scaler.fit_transform(data[FEATURES])
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_fit, X_valid, y_fit, y_valid = train_test_split(
+        X_train, y_train, test_size=0.2, random_state=42, stratify=y_train
+    )
+    splits = {
+        "train": (X_train, y_train), "test": (X_test, y_test),
+        "fit": (X_fit, y_fit), "valid": (X_valid, y_valid),
+    }
+    encoders = {"scaler": scaler, "label_encoder": label_encoder, "soil_encoder": soil_encoder}
+    return splits, encoders
+
+
+def rung_rounds(min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, eta=ETA):
+    """Round budget per rung, growing by eta and ending at max_rounds, e.g. [28, 83, 250]."""
+    rungs = int(math.log(max_rounds / min_rounds, eta) + 1e-9) + 1
+    return [max(1, round(max_rounds / eta ** (rungs - 1 - i))) for i in range(rungs)]
+
+
+def candidates(space=SEARCH_SPACE, limit=None, seed=42):
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if limit is not None and limit < len(grid):
+        grid = random.Random(seed).sample(grid, limit)
+    return grid
+
+
+def param_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+# ======================
+# Workers
+# ======================
+_worker = {}
+
+
+def _init_worker(fit, valid, n_jobs):
+    _worker.update(fit=fit, valid=valid, n_jobs=n_jobs)
+
+
+def evaluate(params, rounds):
+    """Train one configuration for up to `rounds` rounds; validation accuracy at its best iteration."""
+    start = time.perf_counter()
+    (X_fit, y_fit), (X_valid, y_valid) = _worker["fit"], _worker["valid"]
+    model = XGBClassifier(
+        **params,
+        n_estimators=rounds,
+        early_stopping_rounds=EARLY_STOPPING,
+        eval_metric="mlogloss",
+        random_state=42,
+        n_jobs=_worker["n_jobs"],
+    )
+    model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    return {
+        "params": params,
+        "rounds": rounds,
+        "accuracy": float(accuracy_score(y_valid, model.predict(X_valid))),
+        "best_iteration": int(model.best_iteration),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# ======================
+# Checkpoint
+# ======================
+def _settings(dataset_sha256, grid, rungs):
+    return {
+        "format": CHECKPOINT_FORMAT,
+        "dataset_sha256": dataset_sha256,
+        "candidates": [param_key(p) for p in grid],
+        "rungs": rungs,
+        "eta": ETA,
+        "early_stopping": EARLY_STOPPING,
+    }
+
+
+def load_checkpoint(path, settings):
+    if not os.path.exists(path):
+        return {"settings": settings, "elapsed": 0.0, "results": [], "curve": []}
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("settings") != settings:
+        raise SystemExit(f"{path} was written by a search with different data or settings; "
+                         f"pass --fresh to start over")
+    return state
+
+
+def save_checkpoint(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+# ======================
+# Successive halving
+# ======================
+def _best(results):
+    # Results from higher rungs saw more rounds, so they rank first
+    return max(results, key=lambda r: (r["rung"], r["accuracy"]), default=None)
+
+
+def search(splits, grid, rungs, checkpoint_path, workers=None, threads=None, dataset_sha256=""):
+    workers = workers or os.cpu_count()
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    state = load_checkpoint(checkpoint_path, _settings(dataset_sha256, grid, rungs))
+    done = {(r["rung"], param_key(r["params"])): r for r in state["results"]}
+    if done:
+        print(f"Resuming: {len(done)} fits from {checkpoint_path} ({state['elapsed']:.0f}s so far)")
+
+    session_start = time.perf_counter()
+    elapsed_before = state["elapsed"]
+    survivors = grid
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(splits["fit"], splits["valid"], threads)) as pool:
+        for rung, rounds in enumerate(rungs):
+            rung_start = time.perf_counter()
+            todo = [p for p in survivors if (rung, param_key(p)) not in done]
+            futures = [pool.submit(evaluate, p, rounds) for p in todo]
+            for future in as_completed(futures):
+                result = dict(future.result(), rung=rung)
+                done[(rung, param_key(result["params"]))] = result
+                state["results"].append(result)
+                state["elapsed"] = elapsed_before + time.perf_counter() - session_start
+                best = _best(state["results"])
+                state["curve"].append({
+                    "elapsed": state["elapsed"], "fits": len(state["results"]),
+                    "rung": best["rung"], "best_accuracy": best["accuracy"],
+                })
+                save_checkpoint(checkpoint_path, state)
+
+            scored = sorted((done[(rung, param_key(p))] for p in survivors),
+                            key=lambda r: (-r["accuracy"], param_key(r["params"])))
+            print(f"Rung {rung}: {len(survivors):4d} configs x {rounds:3d} rounds in "
+                  f"{time.perf_counter() - rung_start:6.1f}s ({len(todo)} trained), "
+                  f"best validation accuracy {scored[0]['accuracy'] * 100:.2f}%")
+            survivors = [r["params"] for r in scored[:max(1, math.ceil(len(scored) / ETA))]]
+    return state
+
+
+def fit_final(splits, result, threads=None):
+    """Refit the chosen configuration on the full training split; returns (model, test accuracy)."""
+    X_train, y_train = splits["train"]
+    X_test, y_test = splits["test"]
+    model = XGBClassifier(
+        **result["params"],
+        n_estimators=result["best_iteration"] + 1,
+        eval_metric="mlogloss",
+        random_state=42,
+        n_jobs=threads or os.cpu_count(),
+    )
+    model.fit(X_train, y_train)
+    return model, float(accuracy_score(y_test, model.predict(X_test)))
+
+
+def write_curve(path, curve):
+    pd.DataFrame(curve).to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving search for the crop recommendation model")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=None, help="XGBoost threads per worker (default: CPUs / workers)")
+    parser.add_argument("--candidates", type=int, default=None, help="random subset of the grid (default: all)")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("--seed", type=int, default=42, help="seed for --candidates sampling")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--out", default=OUTPUT_PATH, help="where to save the refit model bundle")
+    parser.add_argument("--curve", help="also write the best-so-far curve to this CSV")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.checkpoint)), exist_ok=True)
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    splits, encoders = load_data(args.data)
+    grid = candidates(limit=args.candidates, seed=args.seed)
+    rungs = rung_rounds(args.min_rounds, args.max_rounds)
+    print(f"{len(grid)} configurations, rounds per rung {rungs}, "
+          f"{len(splits['fit'][1]):,} fit / {len(splits['valid'][1]):,} validation rows")
+
+    state = search(splits, grid, rungs, args.checkpoint, args.workers, args.threads, file_sha256(args.data))
+    best = _best(state["results"])
+
+    # Best-so-far curve, thinned to about ten points
+    curve = state["curve"]
+    print("\nBest-so-far (wall clock, fits, rung, validation accuracy):")
+    for point in curve[::max(1, len(curve) // 10)] + curve[-1:]:
+        print(f"  {point['elapsed']:8.1f}s  {point['fits']:5d}  {point['rung']}  {point['best_accuracy'] * 100:6.2f}%")
+    if args.curve:
+        write_curve(args.curve, curve)
+
+    start = time.perf_counter()
+    model, test_accuracy = fit_final(splits, best, args.threads)
+    joblib.dump(dict(model=model, **encoders), args.out)
+    full_grid_rounds = len(grid) * args.max_rounds
+    searched_rounds = sum(min(r["rounds"], r["best_iteration"] + 1 + EARLY_STOPPING) for r in state["results"])
+
+    print(f"\nSearch wall clock: {state['elapsed']:.1f}s over {len(state['results'])} fits "
+          f"(~{searched_rounds:,} boosting rounds vs {full_grid_rounds:,} for the full grid at {args.max_rounds})")
+    print(f"Chosen configuration: {best['params']} with {best['best_iteration'] + 1} rounds")
+    print(f"Validation accuracy: {best['accuracy'] * 100:.2f}%  Test accuracy: {test_accuracy * 100:.2f}%")
+    print(f"Refit in {time.perf_counter() - start:.1f}s, saved to {args.out}")
@@ -0,0 +1,70 @@
+"""
+Client for the shared inference service (see inference_service.py).
+
+When AGRIINTEL_INFERENCE_URL is set, predictor.predict_crop(s) and
+water_fertilizer_plan.get_water_fertilizer_plan(s) send their model work to
+the service instead of loading the models in this process:
+
+    python inference_service.py --port 8770
+    AGRIINTEL_INFERENCE_URL=http://127.0.0.1:8770 streamlit run app.py
+"""
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INFERENCE_URL = os.environ.get("AGRIINTEL_INFERENCE_URL", "").rstrip("/")
+INFERENCE_TIMEOUT = float(os.environ.get("AGRIINTEL_INFERENCE_TIMEOUT", 5.0))
+
+
+class InferenceError(Exception):
+    """Raised when the inference service cannot be reached or rejects a request."""
+
+
+class InferenceClient:
+    """Keep-alive JSON client; every call sends a list of rows and gets one result per row."""
+
+    def __init__(self, base_url=INFERENCE_URL, timeout=INFERENCE_TIMEOUT, pool_maxsize=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path, rows):
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json={"rows": rows}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise InferenceError(f"inference service unreachable: {e}") from e
+        try:
+            body = response.json()
+        except ValueError:
+            raise InferenceError(f"inference service returned HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise InferenceError(body.get("error", f"HTTP {response.status_code}"))
+        return body["results"]
+
+    def crops(self, rows):
+        """
+        Crop labels for rows of N, P, K, ph, temperature, humidity, rainfall,
+        soil_type. Each result is {"crop": ...} or {"error": ...}.
+        """
+        return self._post("/v1/crop", rows)
+
+    def plans(self, rows):
+        """
+        Water & fertilizer plans for rows of crop, soil_N, soil_P, soil_K, ph.
+        Each result has the same shape as get_water_fertilizer_plan's dict.
+        """
+        return self._post("/v1/plan", rows)
+
+    def stats(self):
+        try:
+            return self.session.get(f"{self.base_url}/stats", timeout=self.timeout).json()
+        except (requests.RequestException, ValueError) as e:
+            raise InferenceError(f"inference service unreachable: {e}") from e
+
+
+# Shared client in client mode, None when models run in-process
+inference_client = InferenceClient() if INFERENCE_URL else None
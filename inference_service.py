@@ -0,0 +1,265 @@
+"""
+Shared micro-batching inference service.
+
+One process owns the crop recommendation and water & fertilizer models, so
+Streamlit workers no longer each load their own copy. Requests arrive as
+JSON over local HTTP; concurrent requests for the same model are coalesced
+into one batch (up to --max-batch rows, waiting at most --max-wait seconds
+after the first row) and run through the vectorized batch paths
+(predictor.predict_crops_from_features, get_water_fertilizer_plans).
+
+    python inference_service.py --port 8770 --max-batch 64 --max-wait 0.005
+    AGRIINTEL_INFERENCE_URL=http://127.0.0.1:8770 streamlit run app.py
+
+Endpoints: POST /v1/crop, POST /v1/plan (body {"rows": [...]}, answer
+{"results": [...]}, one result per row), GET /health, GET /stats.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+MAX_BATCH = 64
+MAX_WAIT = 0.005
+
+
+class _Pending:
+    """Rows from one HTTP request, waiting for their batch to run."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.results = None
+        self.error = None
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Single worker thread that drains a queue of requests into batches.
+
+    A batch closes when it holds `max_batch` rows or `max_wait` seconds have
+    passed since its first request arrived, whichever comes first. `fn` takes
+    a list of rows and returns one result per row. `columns` are the keys every
+    row must have; check() rejects a request before it can fail a shared batch.
+    """
+
+    def __init__(self, name, fn, max_batch=MAX_BATCH, max_wait=MAX_WAIT, columns=()):
+        self.name = name
+        self.fn = fn
+        self.columns = list(columns)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "rows": 0, "batches": 0, "errors": 0,
+                       "queue_seconds": 0.0, "batch_seconds": 0.0, "batch_sizes": {}}
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows, timeout=None):
+        """Block until `rows` have been run as part of some batch; returns their results."""
+        pending = _Pending(list(rows))
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"{self.name}: no result within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.results
+
+    def check(self, rows):
+        """Raise ValueError if some row is not an object with all of `columns`."""
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                raise ValueError(f"row {i} must be an object")
+            missing = [c for c in self.columns if c not in row]
+            if missing:
+                raise ValueError(f"row {i} is missing {missing}")
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].rows)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(pending)
+            size += len(pending.rows)
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            started = time.perf_counter()
+            rows = [row for pending in batch for row in pending.rows]
+            try:
+                results = self.fn(rows)
+            except Exception as e:
+                results = None
+                if len(batch) == 1:
+                    batch[0].error = e
+            if results is None and len(batch) > 1:
+                # Something in the batch broke it: run each request on its own, so only that one fails
+                for pending in batch:
+                    try:
+                        pending.results = self.fn(pending.rows)
+                    except Exception as e:
+                        pending.error = e
+            elif results is not None:
+                offset = 0
+                for pending in batch:
+                    pending.results = results[offset:offset + len(pending.rows)]
+                    offset += len(pending.rows)
+            for pending in batch:
+                pending.done.set()
+
+            with self._stats_lock:
+                stats = self._stats
+                stats["requests"] += len(batch)
+                stats["rows"] += size
+                stats["batches"] += 1
+                stats["errors"] += sum(pending.error is not None for pending in batch)
+                stats["queue_seconds"] += sum(started - p.enqueued for p in batch)
+                stats["batch_seconds"] += time.perf_counter() - started
+                stats["batch_sizes"][size] = stats["batch_sizes"].get(size, 0) + 1
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats, batch_sizes=dict(sorted(self._stats["batch_sizes"].items())))
+        batches = stats["batches"] or 1
+        stats["mean_batch_rows"] = stats["rows"] / batches
+        stats["mean_queue_ms"] = stats["queue_seconds"] / (stats["requests"] or 1) * 1e3
+        stats["mean_batch_ms"] = stats["batch_seconds"] / batches * 1e3
+        stats["max_batch"] = self.max_batch
+        stats["max_wait"] = self.max_wait
+        return stats
+
+
+# ======================
+# Batch functions
+# ======================
+def crop_batch(rows):
+    from predictor import predict_crops_from_features
+
+    result = predict_crops_from_features(pd.DataFrame(rows))
+    return [{"crop": crop} if error is None else {"error": error}
+            for crop, error in zip(result["crop"], result["error"])]
+
+
+def plan_batch(rows):
+    from water_fertilizer_plan import get_water_fertilizer_plans, plans_to_dicts
+
+    frame = pd.DataFrame(rows)
+    return plans_to_dicts(frame, get_water_fertilizer_plans(frame))
+
+
+def _json_default(value):
+    # NumPy scalars coming out of the batch paths
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# ======================
+# HTTP front end
+# ======================
+class InferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse connections
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, {name: b.stats() for name, b in self.server.batchers.items()})
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        batcher = self.server.routes.get(self.path)
+        if batcher is None:
+            self._send(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            rows = json.loads(self.rfile.read(length))["rows"]
+            if not isinstance(rows, list):
+                raise ValueError("rows must be a list")
+            batcher.check(rows)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            results = batcher.submit(rows, timeout=self.server.request_timeout)
+        except Exception as e:
+            self._send(500, {"error": f"{batcher.name} inference failed: {e}"})
+            return
+        self._send(200, {"results": results})
+
+    def _send(self, status, body):
+        payload = json.dumps(body, default=_json_default).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, max_batch=MAX_BATCH, max_wait=MAX_WAIT, request_timeout=30.0):
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    server.request_timeout = request_timeout
+    from predictor import FEATURE_COLUMNS
+    from water_fertilizer_plan import BATCH_COLUMNS as PLAN_COLUMNS
+
+    server.batchers = {
+        "crop": MicroBatcher("crop", crop_batch, max_batch, max_wait, FEATURE_COLUMNS),
+        "plan": MicroBatcher("plan", plan_batch, max_batch, max_wait, PLAN_COLUMNS),
+    }
+    server.routes = {"/v1/crop": server.batchers["crop"], "/v1/plan": server.batchers["plan"]}
+    return server
+
+
+def start_inference_server(**kwargs):
+    """Run the service on a background thread. Returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared micro-batching inference service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="rows per batch, at most")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT,
+                        help="seconds a batch waits for more rows after the first")
+    args = parser.parse_args()
+
+    from model_loader import warm_up_all
+    import predictor  # noqa: F401  (registers the model resources)
+    import water_fertilizer_plan  # noqa: F401
+
+    for thread in warm_up_all():
+        thread.join()
+    srv = make_server(args.host, args.port, args.max_batch, args.max_wait)
+    print(f"Inference service on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait * 1e3:.1f}ms)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,206 @@
+"""
+Season-long irrigation scheduling by daily soil water balance.
+
+A FAO-56 style root-zone bucket, simulated for many fields at once: every
+day is one vectorized step over all fields, so a district of plots costs
+`days` NumPy operations rather than fields x days Python iterations.
+
+For each field and day:
+    depletion += crop ET - effective rain
+    if depletion > MAD x TAW: irrigate back to field capacity
+where crop ET follows the four-stage crop coefficient (Kc) curve scaled so
+the season total equals the crop's Water Requirement (mm), and TAW (total
+available water) comes from the soil type and root depth.
+
+Inputs match datasets/new_synthetic_agri_data_india_fixed.csv: Growth
+Duration (days), Water Requirement (mm), Avg Rainfall (mm, annual), Soil
+Type and Season. Daily rain is either passed in or drawn (seeded) so the
+season receives its share of the annual average.
+
+    python irrigation_simulator.py --fields 50000
+"""
+import argparse
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "datasets", "new_synthetic_agri_data_india_fixed.csv")
+
+# Available water capacity, mm of water per metre of root zone
+SOIL_AWC = {
+    "alluvial": 160, "black": 200, "clay": 200, "red": 120, "laterite": 110,
+    "sandy": 70, "loamy": 150, "forest": 150, "mountain": 120, "saline": 130,
+    "coral": 80, "chalky": 110, "peaty": 180,
+}
+DEFAULT_AWC = 140
+
+# Share of the annual rainfall falling in each season, and the chance of a rain day
+SEASON_RAIN = {
+    "kharif": (0.75, 0.45), "rabi": (0.10, 0.08), "zaid": (0.08, 0.06), "whole year": (None, 0.25),
+}
+DEFAULT_SEASON_RAIN = (0.30, 0.20)
+
+# Application efficiency per irrigation method (water_fertilizer_plan labels)
+IRRIGATION_EFFICIENCY = {
+    "drip irrigation": 0.90, "micro irrigation": 0.90, "subsurface textile irrigation": 0.90,
+    "sprinkler irrigation": 0.75, "center-pivot irrigation": 0.80, "lateral move irrigation": 0.80,
+    "rotary irrigation": 0.75, "furrow irrigation": 0.60, "surface irrigation": 0.55,
+    "flood irrigation": 0.50,
+}
+DEFAULT_EFFICIENCY = 0.70
+
+# FAO-56 stage lengths (fractions of the season) and Kc at initial / mid / end
+KC_STAGES = (0.15, 0.25, 0.40, 0.20)
+KC_VALUES = (0.40, 1.15, 0.60)
+
+ROOT_DEPTH_M = 0.6
+MAD = 0.5              # management allowed depletion, fraction of TAW
+EFFECTIVE_RAIN = 0.8   # fraction of a day's rain that enters the root zone
+
+
+def _lookup(table, keys, default):
+    return np.array([table.get(str(k).strip().lower(), default) for k in keys], dtype=float)
+
+
+def kc_curve(durations, days):
+    """Daily crop coefficients, shape (fields, days); zero after harvest."""
+    durations = np.asarray(durations, dtype=float)[:, None]
+    t = (np.arange(days)[None, :] + 0.5) / durations
+    ini, dev, mid, _ = np.cumsum(KC_STAGES)
+    kc_ini, kc_mid, kc_end = KC_VALUES
+    kc = np.select(
+        [t < ini, t < dev, t < mid, t < 1],
+        [kc_ini,
+         kc_ini + (kc_mid - kc_ini) * (t - ini) / (dev - ini),
+         kc_mid,
+         kc_mid + (kc_end - kc_mid) * (t - mid) / (1 - mid)],
+        default=0.0,
+    )
+    return kc
+
+
+def daily_rainfall(season_rain_mm, rain_probability, days, durations, seed=0):
+    """
+    Seeded daily rain, shape (fields, days): rain days are Bernoulli, amounts
+    exponential, rescaled so each field's in-season total equals its mean.
+    """
+    rng = np.random.default_rng(seed)
+    fields = len(season_rain_mm)
+    in_season = np.arange(days)[None, :] < np.asarray(durations)[:, None]
+    wet = (rng.random((fields, days)) < np.asarray(rain_probability)[:, None]) & in_season
+    amount = rng.exponential(1.0, (fields, days)) * wet
+    total = amount.sum(axis=1, keepdims=True)
+    return np.divide(amount * np.asarray(season_rain_mm)[:, None], total,
+                     out=np.zeros_like(amount), where=total > 0)
+
+
+def simulate(durations, water_requirement, soil_type, rainfall, root_depth=ROOT_DEPTH_M, mad=MAD,
+             efficiency=DEFAULT_EFFICIENCY, initial_depletion=0.0):
+    """
+    Run the water balance for every field.
+
+    `rainfall` is daily rain in mm, shape (fields, days). `root_depth`,
+    `mad`, `efficiency` and `initial_depletion` (fraction of TAW) may be
+    scalars or per-field arrays. Returns a dict of arrays:
+    irrigation_mm (net, per day), gross_mm (net / efficiency, per day),
+    depletion_mm (end of day), deep_percolation_mm, et_mm (per day) and
+    per-field totals.
+    """
+    durations = np.asarray(durations, dtype=int)
+    fields, days = len(durations), int(durations.max()) if len(durations) else 0
+    rainfall = np.asarray(rainfall, dtype=float)[:, :days]
+
+    kc = kc_curve(durations, days)
+    et = kc * (np.asarray(water_requirement, dtype=float)[:, None] / kc.sum(axis=1, keepdims=True))
+    taw = _lookup(SOIL_AWC, soil_type, DEFAULT_AWC) * np.broadcast_to(root_depth, (fields,))
+    raw = np.broadcast_to(mad, (fields,)) * taw
+    efficiency = np.broadcast_to(np.asarray(efficiency, dtype=float), (fields,))
+
+    irrigation = np.zeros((fields, days))
+    depletion_log = np.zeros((fields, days))
+    percolation = np.zeros(fields)
+    depletion = np.broadcast_to(initial_depletion, (fields,)) * taw
+    effective_rain = rainfall * EFFECTIVE_RAIN
+
+    for day in range(days):
+        depletion = depletion + et[:, day] - effective_rain[:, day]
+        percolation += np.maximum(-depletion, 0)
+        depletion = np.maximum(depletion, 0)
+        # Irrigate while the crop is still in the field, back to field capacity
+        trigger = (depletion > raw) & (day < durations - 1)
+        irrigation[:, day] = np.where(trigger, depletion, 0)
+        depletion = np.where(trigger, 0, depletion)
+        depletion_log[:, day] = depletion
+
+    gross = irrigation / efficiency[:, None]
+    return {
+        "irrigation_mm": irrigation,
+        "gross_mm": gross,
+        "depletion_mm": depletion_log,
+        "et_mm": et,
+        "taw_mm": taw,
+        "deep_percolation_mm": percolation,
+        "events": (irrigation > 0).sum(axis=1),
+        "total_gross_mm": gross.sum(axis=1),
+    }
+
+
+def simulate_frame(df, efficiency=None, seed=0, **kwargs):
+    """
+    Simulate every row of a frame with the synthetic dataset's columns
+    (Growth Duration (days), Water Requirement (mm), Avg Rainfall (mm),
+    Soil Type, optional Season). `efficiency` may be an array of irrigation
+    method labels (e.g. from water_fertilizer_plan) or numbers.
+    """
+    durations = df["Growth Duration (days)"].to_numpy(dtype=int)
+    seasons = df["Season"] if "Season" in df.columns else pd.Series("", index=df.index)
+    season_rain = np.array([SEASON_RAIN.get(str(s).strip().lower(), DEFAULT_SEASON_RAIN) for s in seasons],
+                           dtype=object)
+    share = np.array([s if s is not None else d / 365 for (s, _), d in zip(season_rain, durations)], dtype=float)
+    probability = np.array([p for _, p in season_rain], dtype=float)
+
+    rain = daily_rainfall(df["Avg Rainfall (mm)"].to_numpy(dtype=float) * share, probability,
+                          int(durations.max()), durations, seed)
+    if efficiency is not None and np.asarray(efficiency).dtype.kind in "OUS":
+        efficiency = _lookup(IRRIGATION_EFFICIENCY, efficiency, DEFAULT_EFFICIENCY)
+    return simulate(durations, df["Water Requirement (mm)"].to_numpy(dtype=float), df["Soil Type"], rain,
+                    efficiency=DEFAULT_EFFICIENCY if efficiency is None else efficiency, **kwargs)
+
+
+def schedule(result, field, sowing_date=None):
+    """Irrigation dates and gross volumes for one simulated field."""
+    sowing_date = sowing_date or datetime.date.today()
+    days = np.flatnonzero(result["irrigation_mm"][field])
+    return [
+        {
+            "day": int(day) + 1,
+            "date": (sowing_date + datetime.timedelta(days=int(day))).isoformat(),
+            "mm": round(float(result["gross_mm"][field, day]), 1),
+            "m3_per_ha": round(float(result["gross_mm"][field, day]) * 10, 1),
+        }
+        for day in days
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate irrigation schedules for many fields")
+    parser.add_argument("--fields", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH).sample(args.fields, replace=True, random_state=args.seed).reset_index(drop=True)
+    start = time.perf_counter()
+    result = simulate_frame(df, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.fields:,} fields x {result['irrigation_mm'].shape[1]} days simulated in {elapsed:.2f}s")
+    print(f"Irrigation events per field: mean {result['events'].mean():.1f}, "
+          f"gross water mean {result['total_gross_mm'].mean():.0f} mm")
+    row = df.iloc[0]
+    print(f"\nField 0: {row['Crop_Planted (Action)']} on {row['Soil Type']} soil, {row['Season']}, "
+          f"{row['Growth Duration (days)']} days, needs {row['Water Requirement (mm)']} mm")
+    for event in schedule(result, 0):
+        print(f"  day {event['day']:>3} ({event['date']}): {event['mm']} mm = {event['m3_per_ha']} m3/ha")
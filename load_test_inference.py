@@ -0,0 +1,116 @@
+"""
+Traffic generator for the inference service.
+
+Many client threads send single-row requests for a fixed time and the
+script reports throughput, latency percentiles and the batch sizes the
+service formed. Without --url it starts a service in-process, once per
+--max-batch value, so batching can be compared on one machine:
+
+    python load_test_inference.py --clients 32 --seconds 10 --max-batch 1 --max-batch 64
+    python load_test_inference.py --url http://127.0.0.1:8770 --endpoint plan
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from inference_client import InferenceClient, InferenceError
+from inference_service import MAX_WAIT, start_inference_server
+
+SOILS = ["Loamy", "Sandy", "Clay", "Black", "Red", "Alluvial"]
+CROPS = ["Rice", "Wheat", "Maize", "Cotton", "Banana", "Potato", "Tomato"]
+
+
+def random_row(endpoint, rng):
+    if endpoint == "crop":
+        return {
+            "N": int(rng.integers(0, 140)), "P": int(rng.integers(5, 145)), "K": int(rng.integers(5, 205)),
+            "ph": round(float(rng.uniform(4, 9)), 2), "temperature": round(float(rng.uniform(10, 40)), 1),
+            "humidity": round(float(rng.uniform(20, 95)), 1), "rainfall": round(float(rng.uniform(20, 300)), 1),
+            "soil_type": str(rng.choice(SOILS)),
+        }
+    return {
+        "crop": str(rng.choice(CROPS)), "soil_N": int(rng.integers(0, 200)), "soil_P": int(rng.integers(0, 100)),
+        "soil_K": int(rng.integers(0, 100)), "ph": round(float(rng.uniform(5, 8)), 2),
+    }
+
+
+def run_load(base_url, endpoint="crop", clients=16, seconds=5.0, seed=0):
+    stop_at = time.perf_counter() + seconds
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+
+    def worker(index):
+        client = InferenceClient(base_url, timeout=10.0, pool_maxsize=1)
+        call = client.crops if endpoint == "crop" else client.plans
+        rng = np.random.default_rng(seed + index)
+        local = []
+        while time.perf_counter() < stop_at:
+            row = random_row(endpoint, rng)
+            start = time.perf_counter()
+            try:
+                call([row])
+            except InferenceError:
+                with lock:
+                    failures[0] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.asarray(latencies) * 1e3
+    return {
+        "requests": len(latencies),
+        "failures": failures[0],
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+    }
+
+
+def report(label, result, stats=None):
+    print(f"{label}: {result['requests']:,} requests ({result['failures']} failed), "
+          f"{result['throughput']:,.0f} req/s, p50 {result['p50_ms']:.1f}ms, p99 {result['p99_ms']:.1f}ms")
+    if stats:
+        print(f"  service: {stats['batches']:,} batches, mean {stats['mean_batch_rows']:.1f} rows, "
+              f"queue {stats['mean_queue_ms']:.2f}ms, batch {stats['mean_batch_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the inference service")
+    parser.add_argument("--url", help="running service; omitted = start one in-process")
+    parser.add_argument("--endpoint", choices=["crop", "plan"], default="crop")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, action="append",
+                        help="in-process service batch size (repeat to compare)")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT)
+    args = parser.parse_args()
+
+    if args.url:
+        result = run_load(args.url, args.endpoint, args.clients, args.seconds)
+        stats = InferenceClient(args.url).stats().get(args.endpoint)
+        report(args.url, result, stats)
+    else:
+        for max_batch in args.max_batch or [1, 64]:
+            server, url = start_inference_server(max_batch=max_batch, max_wait=args.max_wait)
+            # Load the models before the clock starts
+            run_load(url, args.endpoint, clients=1, seconds=0.5)
+            before = server.batchers[args.endpoint].stats()
+            result = run_load(url, args.endpoint, args.clients, args.seconds)
+            stats = server.batchers[args.endpoint].stats()
+            delta = {key: stats[key] - before[key] for key in ("batches", "rows", "requests")}
+            delta["mean_batch_rows"] = delta["rows"] / max(delta["batches"], 1)
+            delta["mean_queue_ms"] = stats["mean_queue_ms"]
+            delta["mean_batch_ms"] = stats["mean_batch_ms"]
+            report(f"max batch {max_batch:>3}", result, delta)
+            server.shutdown()
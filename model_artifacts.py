@@ -0,0 +1,75 @@
+"""
+Helpers shared by the training scripts for producing model bundles.
+
+A bundle is the dict the app loads with joblib: {"model", "scaler",
+"label_encoder", "soil_encoder"}, where "model" is an XGBClassifier.
+"""
+import os
+import tempfile
+
+import joblib
+from xgboost import XGBClassifier
+
+
+# xgb.train parameter names -> XGBClassifier ones
+_PARAM_ALIASES = {"eta": "learning_rate", "seed": "random_state", "min_split_loss": "gamma",
+                  "alpha": "reg_alpha", "lambda": "reg_lambda"}
+_MACHINE_PARAMS = {"nthread", "n_jobs", "device", "verbosity"}
+
+
+def booster_to_classifier(booster, params):
+    """
+    Wrap a Booster trained with xgb.train (multi:softprob) as an
+    XGBClassifier, so predictor.py and tree_compiler.py can use it unchanged.
+
+    The saved model file holds only the trees, so the training `params`
+    (learning rate, subsampling...) are set on the classifier, where
+    training_params() and a later refresh find them again.
+    """
+    fd, path = tempfile.mkstemp(suffix=".ubj")
+    os.close(fd)
+    try:
+        booster.save_model(path)
+        model = XGBClassifier()
+        model.load_model(path)
+    finally:
+        os.remove(path)
+    known = model.get_params()
+    model.set_params(**{
+        _PARAM_ALIASES.get(k, k): v for k, v in params.items()
+        if _PARAM_ALIASES.get(k, k) in known and k not in _MACHINE_PARAMS
+    })
+    return model
+
+
+def training_params(model):
+    """
+    The xgb.train parameters `model` was fitted with. Raises ValueError if
+    they were not recorded (e.g. a classifier loaded from a bare model file),
+    rather than silently continuing with XGBoost's defaults.
+    """
+    params = {k: v for k, v in model.get_xgb_params().items()
+              if v is not None and k not in _MACHINE_PARAMS and k != "base_score"}
+    if "learning_rate" not in params:
+        raise ValueError("the model does not record its training parameters (learning_rate is unset); "
+                         "retrain it or refit with refresh_models.py")
+    return params
+
+
+def save_bundle(path, bundle, dump=joblib.dump):
+    """
+    Write a bundle atomically: readers see the old file or the new one, never
+    a partial one. `dump(bundle, path)` does the writing (joblib by default;
+    the irrigation model is read back with plain pickle).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".bundle-", suffix=".pkl")
+    os.close(fd)
+    try:
+        dump(bundle, tmp)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
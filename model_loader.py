@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+
+_UNSET = object()
+
+logger = logging.getLogger(__name__)
+
+# Every LazyResource created, so the app can warm up / report on all of them
+_resources = []
+
+
+class LazyResource:
+    """
+    Loads a value (model, encoders, CSV...) on first use instead of at import.
+
+    Loading happens once, under a lock, so concurrent sessions never unpickle
+    the same artifact twice. A failed load is not cached: the error is raised
+    to the caller and the next get() tries again (e.g. once the file exists).
+    """
+
+    def __init__(self, name: str, loader, preload: bool = True):
+        self.name = name
+        self.loader = loader
+        self.preload = preload
+        self._value = _UNSET
+        self._lock = threading.Lock()
+        self._warm_thread = None
+        self._refresh_thread = None
+        self.load_seconds = None
+        self.last_error = None
+        _resources.append(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def get(self):
+        value = self._value
+        if value is not _UNSET:
+            return value
+        with self._lock:
+            if self._value is _UNSET:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.last_error = e
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.last_error = None
+                logger.info("Loaded %s in %.3fs", self.name, self.load_seconds)
+            return self._value
+
+    def warm_up(self):
+        """
+        Start loading on a daemon thread, once per process: no-op if loaded or
+        already warmed up. A failed warm-up is not retried here (get() still
+        retries); its error is kept in last_error, see stats().
+        """
+        if self.loaded or self._warm_thread is not None:
+            return self._warm_thread
+
+        def worker():
+            try:
+                self.get()
+            except Exception:
+                pass  # recorded in last_error by get()
+
+        self._warm_thread = threading.Thread(target=worker, name=f"warm-{self.name}", daemon=True)
+        self._warm_thread.start()
+        return self._warm_thread
+
+    def refresh(self) -> bool:
+        """
+        Reload on a daemon thread and swap the new value in once it is ready;
+        get() keeps returning the current value meanwhile. If the reload
+        fails the current value stays. Returns False if a refresh is already
+        running.
+        """
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+
+            def worker():
+                start = time.perf_counter()
+                try:
+                    value = self.loader()
+                except Exception as e:
+                    self.last_error = e
+                    logger.warning("Reload of %s failed, keeping the loaded one: %s", self.name, e)
+                    return
+                with self._lock:
+                    self._value = value
+                    self.load_seconds = time.perf_counter() - start
+                    self.last_error = None
+                logger.info("Reloaded %s in %.3fs", self.name, self.load_seconds)
+
+            self._refresh_thread = threading.Thread(target=worker, name=f"refresh-{self.name}", daemon=True)
+            self._refresh_thread.start()
+            return True
+
+    def reset(self):
+        """Forget the loaded value; the next get() reloads it."""
+        with self._lock:
+            self._value = _UNSET
+            self.load_seconds = None
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "error": str(self.last_error) if self.last_error else None,
+        }
+
+
+def warm_up_all():
+    """
+    Background-load every registered resource that opted into preloading and
+    has not been warmed up yet. Cheap to call on every rerun: resources
+    registered since the last call are the only ones started. Returns the
+    warm-up threads.
+    """
+    threads = [r.warm_up() for r in _resources if r.preload]
+    return [t for t in threads if t is not None]
+
+
+def load_timings():
+    return [r.stats() for r in _resources]
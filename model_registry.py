@@ -0,0 +1,360 @@
+"""
+Versioned model registry.
+
+Each registered artifact gets a directory named after its content hash,
+holding the artifact exactly as it was written plus a manifest.json (feature
+order, encoder classes, model shape, training metrics, training data
+hashes). A CURRENT file per model names the live version. It is replaced
+atomically (os.replace), and every change is appended to history.jsonl,
+which is what rollback walks back through.
+
+    models/registry/<model>/<version>/artifact.pkl
+    models/registry/<model>/<version>/manifest.json
+    models/registry/<model>/CURRENT
+    models/registry/<model>/history.jsonl
+
+predictor.py and water_fertilizer_plan.py read models through a
+ModelPointer. When the model has a CURRENT, they load that version;
+otherwise they load the bare pickle in models/ as before. The pointer is
+re-checked at most every AGRIINTEL_MODEL_CHECK_INTERVAL seconds. A change
+is loaded on a background thread and swapped in, and requests keep using
+the old model until then.
+
+    python model_registry.py import-legacy
+    python model_registry.py register crop_recommendation models/crop_recommendation_model_best.pkl \\
+        --data datasets/Crop_recommendation.csv --metric test_accuracy=0.91 --activate
+    python model_registry.py list crop_recommendation
+    python model_registry.py rollback crop_recommendation
+"""
+import argparse
+import datetime
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from cache_utils import file_sha256
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get("AGRIINTEL_MODEL_REGISTRY", os.path.join(BASE_DIR, "models", "registry"))
+CHECK_INTERVAL = float(os.environ.get("AGRIINTEL_MODEL_CHECK_INTERVAL", 2.0))
+MANIFEST_SCHEMA = 1
+VERSION_LENGTH = 16  # hex digits of the artifact sha256 used as the version id
+
+
+def _joblib_load(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+def _pickle_load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# Registered model names, their pre-registry location and how to read them
+MODELS = {
+    "crop_recommendation": {
+        "legacy_path": os.path.join(BASE_DIR, "models", "crop_recommendation_model.pkl"),
+        "load": _joblib_load,
+        "features": ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'Soil_encoded'],
+        "encoders": ["soil_encoder", "label_encoder"],
+    },
+    "water_fertilizer": {
+        "legacy_path": os.path.join(BASE_DIR, "models", "water_fertilizer_model.pkl"),
+        "load": _pickle_load,
+        "features": ['Crop_encoded', 'N', 'P', 'K', 'pH'],
+        "encoders": ["crop_encoder", "irrigation_encoder", "notes_encoder"],
+    },
+}
+
+
+class RegistryError(Exception):
+    pass
+
+
+def _spec(name):
+    if name not in MODELS:
+        raise RegistryError(f"unknown model '{name}' (known: {', '.join(MODELS)})")
+    return MODELS[name]
+
+
+def model_dir(name, registry=REGISTRY_DIR):
+    _spec(name)
+    return os.path.join(registry, name)
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600
+    os.replace(tmp, path)
+
+
+# ======================
+# Manifests
+# ======================
+def describe(name, bundle):
+    """Manifest fields read off a loaded bundle: features, encoder classes, model shape."""
+    spec = _spec(name)
+    model = bundle["model"]
+    info = {"type": type(model).__name__}
+    features = spec["features"]
+    if hasattr(model, "get_booster"):
+        import xgboost
+
+        booster = model.get_booster()
+        features = list(booster.feature_names or features)
+        info.update(xgboost=xgboost.__version__, rounds=booster.num_boosted_rounds(),
+                    classes=int(getattr(model, "n_classes_", 0)) or None)
+    encoders = {
+        key: [str(c) for c in bundle[key].classes_] for key in spec["encoders"] if key in bundle
+    }
+    return {"features": features, "encoders": encoders, "model": info}
+
+
+def register(name, artifact_path, metrics=None, data_paths=(), activate=False, registry=REGISTRY_DIR):
+    """
+    Copy an artifact into the registry (a no-op if that content is already
+    there) and return its manifest. With activate=True it also becomes CURRENT.
+    """
+    spec = _spec(name)
+    sha256 = file_sha256(artifact_path)
+    version = sha256[:VERSION_LENGTH]
+    directory = os.path.join(model_dir(name, registry), version)
+
+    if not os.path.exists(os.path.join(directory, "manifest.json")):
+        manifest = {
+            "schema": MANIFEST_SCHEMA,
+            "name": name,
+            "version": version,
+            "sha256": sha256,
+            "artifact": "artifact.pkl",
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "source": os.path.abspath(artifact_path),
+            "metrics": dict(metrics or {}),
+            "training_data": [{"path": os.path.abspath(p), "sha256": file_sha256(p)} for p in data_paths],
+            **describe(name, spec["load"](artifact_path)),
+        }
+        # Build the version in a scratch directory and rename it into place
+        os.makedirs(model_dir(name, registry), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=model_dir(name, registry), prefix=".staging-")
+        try:
+            os.chmod(staging, 0o755)  # mkdtemp creates 0700
+            shutil.copyfile(artifact_path, os.path.join(staging, "artifact.pkl"))
+            with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.exists(os.path.join(directory, "manifest.json")):
+                raise
+    if activate:
+        set_current(name, version, registry=registry)
+    return manifest_for(name, version, registry)
+
+
+def manifest_for(name, version, registry=REGISTRY_DIR):
+    path = os.path.join(model_dir(name, registry), version, "manifest.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise RegistryError(f"no version '{version}' of {name}") from None
+
+
+def versions(name, registry=REGISTRY_DIR):
+    """Manifests of every registered version, oldest first."""
+    directory = model_dir(name, registry)
+    if not os.path.isdir(directory):
+        return []
+    found = [manifest_for(name, v, registry) for v in os.listdir(directory)
+             if os.path.exists(os.path.join(directory, v, "manifest.json"))]
+    return sorted(found, key=lambda m: m["created"])
+
+
+# ======================
+# CURRENT pointer
+# ======================
+def current(name, registry=REGISTRY_DIR):
+    """Live version of a model, or None if it has never been activated."""
+    try:
+        with open(os.path.join(model_dir(name, registry), "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def artifact_path(name, version, registry=REGISTRY_DIR):
+    return os.path.join(model_dir(name, registry), version, "artifact.pkl")
+
+
+def history(name, registry=REGISTRY_DIR):
+    path = os.path.join(model_dir(name, registry), "history.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+_pointer_lock = threading.Lock()
+
+
+def set_current(name, version, reason="activate", registry=REGISTRY_DIR):
+    manifest_for(name, version, registry)  # must exist
+    directory = model_dir(name, registry)
+    with _pointer_lock:
+        previous = current(name, registry)
+        if previous == version:
+            return version
+        _atomic_write(os.path.join(directory, "CURRENT"), version + "\n")
+        entry = {"time": time.time(), "version": version, "previous": previous, "reason": reason}
+        with open(os.path.join(directory, "history.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    return version
+
+
+def rollback(name, to=None, registry=REGISTRY_DIR):
+    """
+    Point CURRENT back to the version the live one replaced when it was
+    activated (or to `to`). Rollback entries are skipped, so repeated
+    rollbacks keep walking back, v3 -> v2 -> v1, instead of toggling.
+    """
+    if to is None:
+        entries = [e for e in history(name, registry) if e.get("reason") != "rollback"]
+        live = current(name, registry)
+        to = next((e["previous"] for e in reversed(entries) if e["version"] == live and e["previous"]), None)
+        if to is None:
+            raise RegistryError(f"{name}: no earlier version to roll back to")
+    return set_current(name, to, reason="rollback", registry=registry)
+
+
+# ======================
+# Runtime pointer
+# ======================
+class ModelPointer:
+    """
+    Where a model should currently be loaded from. resolve() returns
+    (token, path): the registry version when there is a CURRENT, else the
+    legacy file and its mtime. token() is the same token, re-checked at most
+    every CHECK_INTERVAL seconds, so callers can compare it on every request;
+    changed() tells them whether a reload is worth starting.
+    """
+
+    def __init__(self, name, registry=REGISTRY_DIR, check_interval=CHECK_INTERVAL):
+        self.name = name
+        self.legacy_path = _spec(name)["legacy_path"]
+        self.registry = registry
+        self.check_interval = check_interval
+        self._token = None
+        self._checked_at = float("-inf")
+        self.failed_token = None  # last token whose artifact failed to load
+
+    def resolve(self):
+        version = current(self.name, self.registry)
+        if version is not None:
+            return f"registry:{version}", artifact_path(self.name, version, self.registry)
+        try:
+            return f"file:{os.stat(self.legacy_path).st_mtime_ns}", self.legacy_path
+        except OSError:
+            return None, self.legacy_path
+
+    def load(self):
+        """(token, bundle) for the current artifact."""
+        token, path = self.resolve()
+        try:
+            bundle = _spec(self.name)["load"](path)
+        except Exception:
+            self.failed_token = token
+            raise
+        self._token, self._checked_at = token, time.monotonic()
+        self.failed_token = None
+        return token, bundle
+
+    def token(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._token = self.resolve()[0]
+            self._checked_at = now
+        return self._token
+
+    def changed(self, loaded_token):
+        """
+        True when the pointer has moved away from `loaded_token` to an
+        artifact that has not already failed to load. A broken version is
+        not retried until CURRENT (or the file) changes again.
+        """
+        token = self.token()
+        return token != loaded_token and token != self.failed_token
+
+
+def _parse_metric(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, float(value)
+    except ValueError:
+        return key, value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versioned model registry")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("register", help="add an artifact (content-addressed)")
+    p.add_argument("name", choices=sorted(MODELS))
+    p.add_argument("path")
+    p.add_argument("--metric", type=_parse_metric, action="append", default=[], help="key=value, repeatable")
+    p.add_argument("--data", action="append", default=[], help="training data file to hash, repeatable")
+    p.add_argument("--activate", action="store_true", help="make it CURRENT")
+
+    p = commands.add_parser("import-legacy", help="register and activate the bare pickles in models/")
+
+    p = commands.add_parser("list", help="versions of a model")
+    p.add_argument("name", choices=sorted(MODELS))
+
+    p = commands.add_parser("show", help="manifest of a version (default: CURRENT)")
+    p.add_argument("name", choices=sorted(MODELS))
+    p.add_argument("version", nargs="?")
+
+    p = commands.add_parser("activate", help="make a version CURRENT")
+    p.add_argument("name", choices=sorted(MODELS))
+    p.add_argument("version")
+
+    p = commands.add_parser("rollback", help="return CURRENT to the version it replaced; repeat to go further back")
+    p.add_argument("name", choices=sorted(MODELS))
+    p.add_argument("--to", help="a specific version instead")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "register":
+            manifest = register(args.name, args.path, dict(args.metric), args.data, args.activate, args.registry)
+            print(f"{args.name} {manifest['version']}" + (" (current)" if args.activate else ""))
+        elif args.command == "import-legacy":
+            for name, spec in MODELS.items():
+                if os.path.exists(spec["legacy_path"]) and current(name, args.registry) is None:
+                    manifest = register(name, spec["legacy_path"], activate=True, registry=args.registry)
+                    print(f"{name} {manifest['version']} (current)")
+        elif args.command == "list":
+            live = current(args.name, args.registry)
+            for m in versions(args.name, args.registry):
+                marker = "*" if m["version"] == live else " "
+                metrics = ", ".join(f"{k}={v}" for k, v in m["metrics"].items())
+                print(f"{marker} {m['version']}  {m['created']}  {m['model'].get('rounds', '-')} rounds  {metrics}")
+        elif args.command == "show":
+            version = args.version or current(args.name, args.registry)
+            if version is None:
+                raise RegistryError(f"{args.name} has no current version")
+            print(json.dumps(manifest_for(args.name, version, args.registry), indent=2))
+        elif args.command == "activate":
+            print(f"{args.name} -> {set_current(args.name, args.version, registry=args.registry)}")
+        elif args.command == "rollback":
+            print(f"{args.name} -> {rollback(args.name, args.to, args.registry)}")
+    except RegistryError as e:
+        parser.exit(1, f"error: {e}\n")
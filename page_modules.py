@@ -0,0 +1,89 @@
+"""
+Which modules and data files each app.py page needs.
+
+app.py imports a page's heavy dependencies inside that page's branch, so a
+cold start only pays for the page being shown. This table drives the
+optional background preload of the other pages after the first paint
+(AGRIINTEL_PRELOAD_PAGES, on by default) and the per-page import profile in
+profile_page_imports.py.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+
+# Imported by app.py whatever the page
+BASE_MODULES = ["streamlit", "resources"]
+
+PAGE_MODULES = {
+    "Recommendation": ["predictor"],
+    "Water & Fertilizer": ["water_fertilizer_plan"],
+    "Rotation & Companion": ["crop_companion", "crop_rotation_planner"],
+    "ROI": ["roi_calculator"],
+    "Report Generator": ["report_builder", "reportlab.lib.colors", "reportlab.lib.pagesizes", "reportlab.lib.styles",
+                         "reportlab.platypus"],
+}
+
+# Registry resources (see resources.py) each page reads
+PAGE_RESOURCES = {
+    "Recommendation": ["states_cities"],
+    "Water & Fertilizer": [],
+    "Rotation & Companion": ["crop_companion", "rotation_rules"],
+    "ROI": ["yield_data"],
+    "Report Generator": [],
+}
+
+PRELOAD_PAGES = os.environ.get("AGRIINTEL_PRELOAD_PAGES", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+_preload_thread = None
+_preload_lock = threading.Lock()
+
+
+def import_base():
+    for name in BASE_MODULES:
+        importlib.import_module(name)
+
+
+def import_page(page):
+    """Import a page's modules and load its registry resources. Returns seconds taken."""
+    from resources import get_resource
+
+    start = time.perf_counter()
+    for name in PAGE_MODULES[page]:
+        importlib.import_module(name)
+    for name in PAGE_RESOURCES[page]:
+        get_resource(name)
+    return time.perf_counter() - start
+
+
+def preload_pages(skip=None):
+    """
+    Once per process, import every other page on a daemon thread and then
+    warm up the models those imports registered. No-op when disabled.
+    """
+    global _preload_thread
+    if not PRELOAD_PAGES:
+        return None
+    with _preload_lock:
+        if _preload_thread is not None:
+            return _preload_thread
+
+        def worker():
+            from model_loader import warm_up_all
+
+            for page in PAGE_MODULES:
+                if page == skip:
+                    continue
+                try:
+                    import_page(page)
+                except Exception as e:
+                    # e.g. reportlab not installed; the page reports it when opened
+                    logger.warning("Preload of page %r failed: %s", page, e)
+            warm_up_all()
+
+        _preload_thread = threading.Thread(target=worker, name="preload-pages", daemon=True)
+        _preload_thread.start()
+        return _preload_thread
@@ -1,17 +1,215 @@
-import joblib
+import logging
+import os
 import numpy as np
+import pandas as pd
+from cache_utils import LRUCache
+from climatology import CLIMATOLOGY_DIR, ClimatologyStore
+from inference_client import InferenceError, inference_client
+from model_loader import LazyResource
+from model_registry import ModelPointer
+from recommendation_grid import RecommendationGrid
+from tree_compiler import USE_COMPILED_TREES, try_compile
 from weather_api import get_weather
 
-# Load saved objects
-model_data = joblib.load("models/crop_recommendation_model.pkl")
-model = model_data["model"]
-scaler = model_data["scaler"]
-label_encoder = model_data["label_encoder"]
-soil_encoder = model_data["soil_encoder"]
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "crop_recommendation_model.pkl")
+
+logger = logging.getLogger(__name__)
+
+# Memo of recent predictions, keyed on quantized features.
+# A step of 0 keeps that feature exact.
+MEMO_SIZE = int(os.environ.get("AGRIINTEL_PREDICTION_MEMO_SIZE", 4096))
+QUANTIZATION_STEPS = {
+    "N": 1.0,
+    "P": 1.0,
+    "K": 1.0,
+    "ph": 0.1,
+    "temperature": float(os.environ.get("AGRIINTEL_MEMO_TEMPERATURE_STEP", 0.5)),
+    "humidity": float(os.environ.get("AGRIINTEL_MEMO_HUMIDITY_STEP", 1.0)),
+    "rainfall": float(os.environ.get("AGRIINTEL_MEMO_RAINFALL_STEP", 1.0)),
+}
+
+
+# The registry's CURRENT crop model, or MODEL_PATH when the registry is not in use
+crop_pointer = ModelPointer("crop_recommendation")
+
+
+def _load_crop_model():
+    token, data = crop_pointer.load()
+    forest = try_compile(data["model"], "crop recommendation model") if USE_COMPILED_TREES else None
+    if forest is not None:
+        data["forest"] = forest
+    # The memo lives with the artifact, so a reloaded model starts with an empty one
+    data["memo"] = LRUCache(MEMO_SIZE)
+    data["token"] = token
+    return data
+
+
+# Saved model + scaler + encoders, loaded on first prediction
+# (not preloaded in client mode, where the inference service owns the model)
+crop_model = LazyResource("crop_recommendation_model", _load_crop_model, preload=inference_client is None)
+memo_invalidations = 0
+
+# Optional precomputed grid (see recommendation_grid.py) answering in O(1)
+GRID_DIR = os.environ.get("AGRIINTEL_CROP_GRID")
+GRID_MODE = os.environ.get("AGRIINTEL_CROP_GRID_MODE", "nearest")  # or "multilinear"
+
+
+def _load_grid():
+    """
+    (pointer token, grid), the grid being None when it is missing, broken or
+    built from another model. That outcome is kept like a loaded grid, so it
+    is logged once and only retried when the model pointer moves.
+    """
+    token, path = crop_pointer.resolve()
+    try:
+        grid = RecommendationGrid(GRID_DIR)
+        matches = grid.matches_model(path)
+    except Exception as e:
+        logger.warning("Crop grid at %s could not be loaded; using the live model: %s", GRID_DIR, e)
+        return token, None
+    if not matches:
+        logger.warning("Crop grid was built from a different model artifact; using the live model.")
+        return token, None
+    return token, grid
+
+
+crop_grid = LazyResource("crop_recommendation_grid", _load_grid) if GRID_DIR else None
+
+# Where weather features come from:
+#   "live"        - current OpenWeatherMap reading (rainfall = last hour)
+#   "climatology" - offline monthly normals, seasonal rainfall (see climatology.py)
+#   "blend"       - live temperature/humidity mixed with normals, seasonal rainfall
+WEATHER_MODE = os.environ.get("AGRIINTEL_WEATHER_MODE", "live")
+LIVE_WEIGHT = float(os.environ.get("AGRIINTEL_LIVE_WEATHER_WEIGHT", 0.5))
+
+climatology = LazyResource("climatology", lambda: ClimatologyStore(CLIMATOLOGY_DIR), preload=WEATHER_MODE != "live")
+
+
+def weather_features(city, weather_mode=None, month=None):
+    """(temperature, humidity, rainfall) model features for `city`."""
+    mode = weather_mode or WEATHER_MODE
+    if mode == "live":
+        return tuple(get_weather(city))
+    if mode not in ("climatology", "blend"):
+        raise ValueError(f"Unknown weather mode '{mode}'")
+
+    temperature, humidity, rainfall = climatology.get().seasonal(city, month)
+    if mode == "blend":
+        try:
+            live_temperature, live_humidity, _ = get_weather(city)
+        except Exception:
+            # Offline or provider down: the normals alone are still a valid input
+            return temperature, humidity, rainfall
+        temperature = LIVE_WEIGHT * live_temperature + (1 - LIVE_WEIGHT) * temperature
+        humidity = LIVE_WEIGHT * live_humidity + (1 - LIVE_WEIGHT) * humidity
+    return temperature, humidity, rainfall
+
+
+def _get_crop_model():
+    """
+    Loaded artifact. When the registry's CURRENT (or the bare file's mtime)
+    changes, the new model loads in the background and replaces this one,
+    memo included; requests keep being served by this one until then. A
+    version that fails to load is not retried until the pointer moves again.
+    """
+    global memo_invalidations
+    data = crop_model.get()
+    if crop_pointer.changed(data["token"]) and crop_model.refresh():
+        memo_invalidations += 1
+    return data
+
+
+def invalidate_prediction_memo():
+    """Forget memoized predictions (e.g. after replacing the model in place)."""
+    global memo_invalidations
+    if crop_model.loaded:
+        crop_model.get()["memo"].clear()
+    memo_invalidations += 1
+
+
+def prediction_memo_stats() -> dict:
+    stats = crop_model.get()["memo"].stats() if crop_model.loaded else {}
+    stats["invalidations"] = memo_invalidations
+    stats["steps"] = dict(QUANTIZATION_STEPS)
+    return stats
+
+
+def _quantize(name, value):
+    """Memo bucket index of `value` for feature `name`."""
+    step = QUANTIZATION_STEPS[name]
+    if not step:
+        return value
+    return int(round(float(value) / step))
+
+# Columns expected by predict_crops
+BATCH_COLUMNS = ["N", "P", "K", "ph", "soil_type", "city"]
+
+
+def _get_grid():
+    if crop_grid is None:
+        return None
+    try:
+        token, grid = crop_grid.get()
+    except Exception:
+        # The model pointer itself could not be resolved: fall back to the model
+        return None
+    if token != crop_pointer.token():
+        # The model was swapped or rolled back: re-check the grid against it, using the model meanwhile
+        crop_grid.refresh()
+        return None
+    return grid
+
+
+def _predict_from_grid(grid, N, P, K, ph, soil_type, city, weather_mode=None, month=None):
+    try:
+        temperature, humidity, rainfall = weather_features(city, weather_mode, month)
+    except Exception as e:
+        return f"⚠️ Weather API Error: {e}"
+
+    if soil_type not in grid.soils:
+        return f"⚠️ Unknown soil type: '{soil_type}'. Please choose a valid one."
+
+    return grid.predict(soil_type, N, P, K, ph, temperature, humidity, rainfall, mode=GRID_MODE)
+
+
+def _predict_remote(N, P, K, ph, soil_type, city, weather_mode=None, month=None):
+    # Weather stays local (this process owns the weather cache); inference goes to the service
+    try:
+        temperature, humidity, rainfall = weather_features(city, weather_mode, month)
+    except Exception as e:
+        return f"⚠️ Weather API Error: {e}"
+    try:
+        result = inference_client.crops([{
+            "N": N, "P": P, "K": K, "ph": ph, "temperature": temperature, "humidity": humidity,
+            "rainfall": rainfall, "soil_type": soil_type,
+        }])[0]
+    except InferenceError as e:
+        return f"⚠️ Crop model unavailable: {e}"
+    return result.get("crop") or result["error"]
+
+
+def predict_crop(N, P, K, ph, soil_type, city, weather_mode=None, month=None):
+    """
+    Recommend a crop for one farm. `weather_mode` overrides WEATHER_MODE;
+    `month` (1-12) picks the season for climatology modes (default: now).
+    """
+    grid = _get_grid()
+    if grid is not None:
+        return _predict_from_grid(grid, N, P, K, ph, soil_type, city, weather_mode, month)
+    if inference_client is not None:
+        return _predict_remote(N, P, K, ph, soil_type, city, weather_mode, month)
+
+    try:
+        model_data = _get_crop_model()
+    except Exception as e:
+        return f"⚠️ Crop model unavailable: {e}"
+    model = model_data.get("forest", model_data["model"])
+    scaler = model_data["scaler"]
+    label_encoder = model_data["label_encoder"]
+    soil_encoder = model_data["soil_encoder"]
 
-def predict_crop(N, P, K, ph, soil_type, city):
     try:
-        temperature, humidity, rainfall = get_weather(city)
+        temperature, humidity, rainfall = weather_features(city, weather_mode, month)
     except Exception as e:
         return f"⚠️ Weather API Error: {e}"
 
@@ -19,13 +217,174 @@ def predict_crop(N, P, K, ph, soil_type, city):
     if soil_type not in soil_encoder.classes_:
         return f"⚠️ Unknown soil type: '{soil_type}'. Please choose a valid one."
 
+    # Repeat queries in the same quantized cell skip scaling and inference. The
+    # cell is only the memo key: a miss scores the exact inputs, as the batch paths do.
+    key = [soil_type]
+    for name, value in (("N", N), ("P", P), ("K", K), ("ph", ph),
+                        ("temperature", temperature), ("humidity", humidity), ("rainfall", rainfall)):
+        key.append(_quantize(name, value))
+    key = tuple(key)
+    memo = model_data["memo"]
+    prediction_label = memo.get(key)
+    if prediction_label is not None:
+        return prediction_label
+
     soil_encoded = soil_encoder.transform([soil_type])[0]
 
     # Prepare features
-    features = np.array([[N, P, K, temperature, humidity, ph, rainfall, soil_encoded]])
+    features = np.array([[N, P, K, temperature, humidity, ph, rainfall, soil_encoded]], dtype=float)
     features_scaled = scaler.transform(features)
 
     # Predict
     prediction_encoded = model.predict(features_scaled)[0]
     prediction_label = label_encoder.inverse_transform([prediction_encoded])[0]
+    memo.put(key, prediction_label)
     return prediction_label
+
+
+def predict_crops(frame, weather_mode=None, month=None):
+    """
+    Batch version of predict_crop.
+
+    `frame` is a DataFrame (or anything pandas can turn into one) with columns
+    N, P, K, ph, soil_type and city. Weather features are looked up once per
+    unique city, and soil encoding, scaling and inference each run once over
+    all valid rows. `weather_mode` and `month` are as for predict_crop.
+    In client mode (AGRIINTEL_INFERENCE_URL) the scored rows go to the
+    inference service in one request instead of a local model.
+    Returns a DataFrame on the same index with columns crop, temperature,
+    humidity, rainfall and error; error is None for rows that were scored.
+    """
+    frame = pd.DataFrame(frame)
+    missing = [c for c in BATCH_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"predict_crops: missing columns {missing}")
+
+    result = pd.DataFrame(index=frame.index)
+    result["crop"] = None
+    result["temperature"] = np.nan
+    result["humidity"] = np.nan
+    result["rainfall"] = np.nan
+    errors = pd.Series(None, index=frame.index, dtype=object)
+
+    model_data = None
+    if inference_client is None:
+        try:
+            model_data = _get_crop_model()
+        except Exception as e:
+            result["error"] = f"⚠️ Crop model unavailable: {e}"
+            return result
+
+    # Numeric inputs
+    numeric = frame[["N", "P", "K", "ph"]].apply(pd.to_numeric, errors="coerce")
+    bad = numeric.isna().any(axis=1)
+    errors[bad] = "⚠️ Invalid N/P/K/pH value."
+
+    # Soil type (the inference service checks it in client mode)
+    if model_data is not None:
+        bad = errors.isna() & ~frame["soil_type"].isin(model_data["soil_encoder"].classes_)
+        errors[bad] = frame.loc[bad, "soil_type"].map(
+            lambda s: f"⚠️ Unknown soil type: '{s}'. Please choose a valid one."
+        )
+
+    # Weather: one lookup per unique city
+    weather = {}
+    for city in frame.loc[errors.isna(), "city"].unique():
+        try:
+            weather[city] = weather_features(city, weather_mode, month)
+        except Exception as e:
+            weather[city] = f"⚠️ Weather API Error: {e}"
+    city_weather = frame["city"].map(weather)
+    bad = errors.isna() & city_weather.map(lambda w: isinstance(w, str))
+    errors[bad] = city_weather[bad]
+
+    ok = errors.isna().to_numpy()
+    if ok.any():
+        temperature, humidity, rainfall = (np.array(v, dtype=float) for v in zip(*city_weather[ok]))
+        values = numeric[ok]
+        soil = frame.loc[ok, "soil_type"].to_numpy()
+
+        if model_data is None:
+            predictions, remote_errors = _predict_crops_remote(values, soil, temperature, humidity, rainfall)
+            scored = np.array([e is None for e in remote_errors])
+            errors[ok] = remote_errors
+        else:
+            features = np.column_stack([
+                values["N"], values["P"], values["K"], temperature, humidity, values["ph"], rainfall,
+                model_data["soil_encoder"].transform(soil),
+            ])
+            features_scaled = model_data["scaler"].transform(features)
+            predictions = model_data["label_encoder"].inverse_transform(model_data["model"].predict(features_scaled))
+            scored = np.ones(len(predictions), dtype=bool)
+
+        rows = ok.copy()
+        rows[ok] = scored
+        result.loc[rows, "crop"] = np.asarray(predictions, dtype=object)[scored]
+        result.loc[rows, "temperature"] = temperature[scored]
+        result.loc[rows, "humidity"] = humidity[scored]
+        result.loc[rows, "rainfall"] = rainfall[scored]
+
+    result["error"] = errors.where(errors.notna(), None)
+    return result
+
+
+def _predict_crops_remote(values, soil, temperature, humidity, rainfall):
+    """(crops, errors) for validated rows, scored by the inference service in one request."""
+    rows = [
+        {"N": n, "P": p, "K": k, "ph": ph, "temperature": t, "humidity": h, "rainfall": r, "soil_type": s}
+        for n, p, k, ph, t, h, r, s in zip(
+            values["N"].tolist(), values["P"].tolist(), values["K"].tolist(), values["ph"].tolist(),
+            temperature.tolist(), humidity.tolist(), rainfall.tolist(), soil.tolist(),
+        )
+    ]
+    try:
+        results = inference_client.crops(rows)
+    except InferenceError as e:
+        return [None] * len(rows), [f"⚠️ Crop model unavailable: {e}"] * len(rows)
+    return [r.get("crop") for r in results], [r.get("error") for r in results]
+
+
+# Columns expected by predict_crops_from_features (weather already resolved)
+FEATURE_COLUMNS = ["N", "P", "K", "ph", "temperature", "humidity", "rainfall", "soil_type"]
+
+
+def predict_crops_from_features(frame):
+    """
+    Model-only batch inference: rows already carry temperature, humidity and
+    rainfall, so no weather lookups happen. Used by the inference service.
+    Returns a DataFrame on the same index with columns crop and error.
+    """
+    frame = pd.DataFrame(frame)
+    missing = [c for c in FEATURE_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"predict_crops_from_features: missing columns {missing}")
+
+    result = pd.DataFrame({"crop": None}, index=frame.index)
+    errors = pd.Series(None, index=frame.index, dtype=object)
+
+    try:
+        model_data = _get_crop_model()
+    except Exception as e:
+        result["error"] = f"⚠️ Crop model unavailable: {e}"
+        return result
+    soil_encoder = model_data["soil_encoder"]
+
+    numeric = frame[FEATURE_COLUMNS[:-1]].apply(pd.to_numeric, errors="coerce")
+    errors[numeric.isna().any(axis=1)] = "⚠️ Invalid N/P/K/pH or weather value."
+    bad = errors.isna() & ~frame["soil_type"].isin(soil_encoder.classes_)
+    errors[bad] = frame.loc[bad, "soil_type"].map(
+        lambda s: f"⚠️ Unknown soil type: '{s}'. Please choose a valid one."
+    )
+
+    ok = errors.isna().to_numpy()
+    if ok.any():
+        values = numeric[ok]
+        features = np.column_stack([
+            values["N"], values["P"], values["K"], values["temperature"], values["humidity"], values["ph"],
+            values["rainfall"], soil_encoder.transform(frame.loc[ok, "soil_type"].to_numpy()),
+        ])
+        predictions = model_data["model"].predict(model_data["scaler"].transform(features))
+        result.loc[ok, "crop"] = model_data["label_encoder"].inverse_transform(predictions)
+
+    result["error"] = errors.where(errors.notna(), None)
+    return result
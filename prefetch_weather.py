@@ -0,0 +1,155 @@
+"""
+Bulk weather pre-warmer for every city in indian_states_cities.
+
+Fetches concurrently (bounded by --concurrency) under a token-bucket rate
+limit that respects the provider quota, and writes each reading into the
+shared weather cache as soon as it arrives. Every request to the provider
+takes a token, including WeatherClient's retries.
+
+    python prefetch_weather.py --rate 1 --concurrency 8
+    python prefetch_weather.py --fake --fake-latency 0.2 --rate 200    # local fake provider
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from indian_states_cities import indian_states_cities
+from weather_cache import normalize_city
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def all_cities(states=None):
+    """Unique cities (first spelling wins) for the given states, or all states."""
+    seen = set()
+    cities = []
+    for state, state_cities in indian_states_cities.items():
+        if states and state not in states:
+            continue
+        for city in state_cities:
+            key = normalize_city(city)
+            if key not in seen:
+                seen.add(key)
+                cities.append(city)
+    return cities
+
+
+async def prefetch(cities, client, cache, concurrency=8, rate=1.0, burst=1.0, report_every=1.0, out=sys.stdout):
+    """
+    Fetch weather for `cities` and store each reading in `cache`.
+    Returns a stats dict (ok, failed, errors, elapsed, throughput).
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="prefetch"))
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate, burst)
+
+    def take_token():
+        # Runs on the fetch thread, before each attempt; waits for the bucket on the event loop
+        asyncio.run_coroutine_threadsafe(bucket.acquire(), loop).result()
+
+    async def fetch_one(city):
+        async with semaphore:
+            try:
+                value = await asyncio.to_thread(client.fetch, city, take_token)
+            except Exception as e:
+                return city, None, e
+            # SQLite write: off the event loop
+            await asyncio.to_thread(cache.put, city, value)
+            return city, value, None
+
+    stats = {"total": len(cities), "ok": 0, "failed": 0, "errors": {}}
+    start = last_report = time.perf_counter()
+
+    for done in asyncio.as_completed([fetch_one(c) for c in cities]):
+        city, value, error = await done
+        if error is None:
+            stats["ok"] += 1
+        else:
+            stats["failed"] += 1
+            stats["errors"][city] = str(error)
+
+        now = time.perf_counter()
+        finished = stats["ok"] + stats["failed"]
+        if now - last_report >= report_every or finished == stats["total"]:
+            last_report = now
+            elapsed = now - start
+            print(
+                f"[{finished}/{stats['total']}] ok={stats['ok']} failed={stats['failed']} "
+                f"{finished / elapsed if elapsed else 0:.1f} cities/s",
+                file=out, flush=True,
+            )
+
+    stats["elapsed"] = time.perf_counter() - start
+    stats["throughput"] = stats["total"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the weather cache for Indian cities")
+    parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="requests per second (OpenWeatherMap free tier: 60/min)")
+    parser.add_argument("--burst", type=float, default=1.0, help="token bucket capacity")
+    parser.add_argument("--state", action="append", help="only prefetch this state (repeatable)")
+    parser.add_argument("--limit", type=int, help="stop after this many cities")
+    parser.add_argument("--skip-fresh", action="store_true", help="skip cities with a fresh cached reading")
+    parser.add_argument("--base-url", help="weather endpoint (defaults to AGRIINTEL_WEATHER_URL / OpenWeatherMap)")
+    parser.add_argument("--db", help="SQLite weather store (defaults to AGRIINTEL_WEATHER_DB)")
+    parser.add_argument("--fake", action="store_true", help="run against an in-process fake provider")
+    parser.add_argument("--fake-latency", type=float, default=0.1)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    from weather_api import WeatherClient, weather_cache
+    from weather_cache import WeatherCache
+
+    client_kwargs = {"pool_maxsize": args.concurrency}
+    if args.fake:
+        from fake_weather_server import start_fake_server
+        _, args.base_url = start_fake_server(latency=args.fake_latency, error_rate=args.fake_error_rate)
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    client = WeatherClient(**client_kwargs)
+    cache = WeatherCache(client.fetch, db_path=args.db) if args.db else weather_cache
+
+    cities = all_cities(args.state)
+    if args.skip_fresh:
+        cities = [c for c in cities if not cache.is_fresh(c)]
+    if args.limit:
+        cities = cities[:args.limit]
+
+    print(f"Prefetching weather for {len(cities)} cities "
+          f"(concurrency={args.concurrency}, rate={args.rate}/s)")
+    stats = asyncio.run(prefetch(cities, client, cache, args.concurrency, args.rate, args.burst))
+    print(f"Done in {stats['elapsed']:.1f}s: {stats['ok']} ok, {stats['failed']} failed, "
+          f"{stats['throughput']:.1f} cities/s")
+    for city, error in list(stats["errors"].items())[:10]:
+        print(f"  {city}: {error}")
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
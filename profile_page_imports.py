@@ -0,0 +1,122 @@
+"""
+Per-page import-time profile for app.py.
+
+For every page a fresh interpreter runs with -X importtime. It imports the
+modules every page needs (page_modules.BASE_MODULES), prints a marker, then
+imports that page's modules and loads its registry resources. Only imports
+after the marker are counted, so each number is what opening that page
+costs on top of the app shell. Heaviest modules are listed by self time.
+
+    python profile_page_imports.py
+    python profile_page_imports.py --budget "Recommendation=1500" --json report.json
+
+Exit status is 1 when a page exceeds its budget (PAGE_BUDGET_MS, or
+--budget overrides), so a CI step can catch import-time regressions.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from page_modules import PAGE_MODULES
+
+# Cold-import budget per page, milliseconds (imports + registry data)
+PAGE_BUDGET_MS = {
+    "Recommendation": 2000,
+    "Water & Fertilizer": 2000,
+    "Rotation & Companion": 1500,
+    "ROI": 200,
+    "Report Generator": 800,
+}
+
+MARKER = "--page-imports--"
+_SCRIPT = f"""
+import sys, time
+import page_modules
+page_modules.import_base()
+sys.stderr.write({MARKER!r} + "\\n")
+seconds = page_modules.import_page(sys.argv[1])
+sys.stderr.write("page-seconds %.6f\\n" % seconds)
+"""
+
+
+def profile_page(page, repeat=1):
+    """Import profile for one page: best of `repeat` cold runs."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _SCRIPT, page],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"page {page!r} failed to import:\n{proc.stderr[-2000:]}")
+        result = parse_importtime(proc.stderr.split(MARKER, 1)[1])
+        if best is None or result["total_ms"] < best["total_ms"]:
+            best = result
+    return best
+
+
+def parse_importtime(text):
+    modules = []
+    total_ms = None
+    for line in text.splitlines():
+        if line.startswith("page-seconds"):
+            total_ms = float(line.split()[1]) * 1e3
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1e3,
+            "cumulative_ms": int(cumulative_us) / 1e3,
+            "top_level": not name[1:].startswith(" "),
+        })
+    import_ms = sum(m["cumulative_ms"] for m in modules if m["top_level"])
+    return {
+        "total_ms": total_ms,
+        "import_ms": import_ms,
+        "data_ms": max(total_ms - import_ms, 0.0),
+        "modules": len(modules),
+        "heaviest": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:10],
+    }
+
+
+def _parse_budget(text):
+    page, _, ms = text.rpartition("=")
+    if page not in PAGE_MODULES:
+        raise argparse.ArgumentTypeError(f"unknown page '{page}'")
+    return page, float(ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-page import-time profile for app.py")
+    parser.add_argument("--repeat", type=int, default=3, help="cold runs per page (best is kept)")
+    parser.add_argument("--top", type=int, default=5, help="heaviest modules listed per page")
+    parser.add_argument("--budget", type=_parse_budget, action="append", default=[],
+                        help="override a page budget as 'Page=ms'")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    budgets = dict(PAGE_BUDGET_MS, **dict(args.budget))
+    report, over = {}, []
+    for page in PAGE_MODULES:
+        result = profile_page(page, args.repeat)
+        result["budget_ms"] = budgets.get(page)
+        report[page] = result
+        status = "ok"
+        if result["budget_ms"] is not None and result["total_ms"] > result["budget_ms"]:
+            status = "OVER BUDGET"
+            over.append(page)
+        print(f"{page:<22} {result['total_ms']:8.1f}ms (imports {result['import_ms']:7.1f}ms, "
+              f"data {result['data_ms']:6.1f}ms, {result['modules']:4d} modules) "
+              f"budget {result['budget_ms']}ms  {status}")
+        for m in result["heaviest"][:args.top]:
+            print(f"    {m['self_ms']:7.1f}ms  {m['module']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if over:
+        print(f"\nOver budget: {', '.join(over)}")
+        sys.exit(1)
@@ -0,0 +1,267 @@
+"""
+Precomputed crop recommendation grid.
+
+The recommender's inputs are bounded (N/P/K 0-200, pH 0-14, seven soils), so
+predictions can be computed offline over a quantized grid of
+(N, P, K, pH, temperature, humidity, rainfall) for every soil and stored as
+memory-mapped uint8 arrays of label indices. A lookup is then O(1).
+
+    python recommendation_grid.py build --workers 8
+    python recommendation_grid.py build --axis N=0:200:10 --axis rainfall=0:3000:100
+    python recommendation_grid.py check --samples 20000
+
+predictor uses the grid instead of the model when AGRIINTEL_CROP_GRID points
+at a built grid directory.
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import time
+from multiprocessing import Pool
+
+import joblib
+import numpy as np
+
+from cache_utils import file_sha256
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "crop_recommendation_model.pkl")
+GRID_DIR = os.path.join(os.path.dirname(__file__), "models", "crop_grid")
+
+# Axis name -> (start, stop, step), stop inclusive. Order is the grid's axis order.
+DEFAULT_AXES = {
+    "N": (0, 200, 20),
+    "P": (0, 200, 20),
+    "K": (0, 200, 20),
+    "ph": (0, 14, 1),
+    "temperature": (0, 45, 5),
+    "humidity": (20, 100, 10),
+    "rainfall": (0, 3000, 250),
+}
+AXIS_NAMES = list(DEFAULT_AXES)
+
+# Model feature order (see train_crop_recommendation_model.py)
+FEATURE_ORDER = ["N", "P", "K", "temperature", "humidity", "ph", "rainfall"]
+
+
+def axis_values(start, stop, step):
+    return np.round(np.arange(start, stop + step / 2, step), 10)
+
+
+def _soil_file(directory, soil_index):
+    # Files are numbered: the trained soil classes include near-duplicates like "Clay" / "Clay "
+    return os.path.join(directory, f"soil_{soil_index}.npy")
+
+
+# ======================
+# Lookup
+# ======================
+class RecommendationGrid:
+    """Read-only view over a built grid directory."""
+
+    def __init__(self, directory=GRID_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, "grid.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.axes = {name: tuple(self.meta["axes"][name]) for name in AXIS_NAMES}
+        self.starts = np.array([self.axes[a][0] for a in AXIS_NAMES], dtype=float)
+        self.steps = np.array([self.axes[a][2] for a in AXIS_NAMES], dtype=float)
+        self.shape = tuple(len(axis_values(*self.axes[a])) for a in AXIS_NAMES)
+        self.labels = np.array(self.meta["labels"], dtype=object)
+        self.soils = list(self.meta["soils"])
+        # Mapped up front: a rebuild swaps in a new directory, and these stay on the files this meta describes
+        self._arrays = {
+            soil: np.load(_soil_file(directory, i), mmap_mode="r") for i, soil in enumerate(self.soils)
+        }
+        # All 2^7 corner offsets of a grid cell, for the multilinear vote
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(AXIS_NAMES))))
+
+    def array(self, soil):
+        return self._arrays[soil]
+
+    def matches_model(self, model_path=MODEL_PATH) -> bool:
+        try:
+            return file_sha256(model_path) == self.meta["model_sha256"]
+        except OSError:
+            return False
+
+    def _position(self, values):
+        position = (np.asarray(values, dtype=float) - self.starts) / self.steps
+        return np.clip(position, 0, np.array(self.shape) - 1)
+
+    def lookup(self, soil, N, P, K, ph, temperature, humidity, rainfall, mode="nearest"):
+        """
+        Label index for one input.
+
+        mode="nearest" reads the closest cell. mode="multilinear" takes a vote
+        over the 128 corners of the enclosing cell, weighted like multilinear
+        interpolation, which smooths answers between grid points.
+        """
+        position = self._position([N, P, K, ph, temperature, humidity, rainfall])
+        array = self.array(soil)
+        if mode == "nearest":
+            return int(array[tuple(np.rint(position).astype(int))])
+
+        low = np.floor(position).astype(int)
+        frac = position - low
+        corners = np.minimum(low + self._corners, np.array(self.shape) - 1)
+        weights = np.prod(np.where(self._corners == 1, frac, 1 - frac), axis=1)
+        labels = array[tuple(corners.T)]
+        return int(np.argmax(np.bincount(labels, weights=weights, minlength=len(self.labels))))
+
+    def predict(self, soil, N, P, K, ph, temperature, humidity, rainfall, mode="nearest"):
+        """Crop name for one input."""
+        return self.labels[self.lookup(soil, N, P, K, ph, temperature, humidity, rainfall, mode)]
+
+
+# ======================
+# Build
+# ======================
+_worker = {}
+
+
+def _init_worker(model_path):
+    data = joblib.load(model_path)
+    model = data["model"]
+    if hasattr(model, "set_params"):
+        model.set_params(n_jobs=1)
+    _worker["data"] = data
+
+
+def _build_slab(task):
+    """Fill grid[soil][n_index, :, ...] by predicting one P-plane at a time."""
+    directory, soil_index, soil_code, n_index, axes = task
+    data = _worker["data"]
+    values = {name: axis_values(*axes[name]) for name in AXIS_NAMES}
+    out = np.load(_soil_file(directory, soil_index), mmap_mode="r+")
+
+    rest = np.meshgrid(*(values[a] for a in AXIS_NAMES[2:]), indexing="ij")
+    rest = {name: grid.ravel() for name, grid in zip(AXIS_NAMES[2:], rest)}
+    rows = len(rest["K"])
+    for p_index, p in enumerate(values["P"]):
+        columns = {"N": np.full(rows, values["N"][n_index]), "P": np.full(rows, p), **rest}
+        features = np.column_stack([columns[f] for f in FEATURE_ORDER] + [np.full(rows, soil_code)])
+        labels = data["model"].predict(data["scaler"].transform(features))
+        out[n_index, p_index] = labels.astype(np.uint8).reshape(out.shape[2:])
+    out.flush()
+    return soil_index, n_index
+
+
+def build_grid(directory=GRID_DIR, axes=None, workers=None, model_path=MODEL_PATH):
+    axes = dict(DEFAULT_AXES, **(axes or {}))
+    data = joblib.load(model_path)
+    labels = list(data["label_encoder"].classes_)
+    soils = list(data["soil_encoder"].classes_)
+    if len(labels) > 256:
+        raise ValueError("uint8 grid supports at most 256 crop labels")
+
+    # Built next to the target and swapped in at the end; readers never see a half-built grid
+    final = os.path.abspath(directory)
+    directory = f"{final}.building-{os.getpid()}"
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    shape = tuple(len(axis_values(*axes[a])) for a in AXIS_NAMES)
+    for soil_index in range(len(soils)):
+        np.lib.format.open_memmap(_soil_file(directory, soil_index), mode="w+", dtype=np.uint8, shape=shape).flush()
+
+    tasks = [
+        (directory, soil_index, int(code), n_index, axes)
+        for soil_index, code in enumerate(data["soil_encoder"].transform(soils))
+        for n_index in range(shape[0])
+    ]
+    cells = int(np.prod(shape)) * len(soils)
+    print(f"Building {len(soils)} x {shape} grid ({cells:,} cells, {cells / 1e6:.1f} MB) "
+          f"with {workers or os.cpu_count()} workers")
+
+    start = time.perf_counter()
+    with Pool(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+        for done, _ in enumerate(pool.imap_unordered(_build_slab, tasks), 1):
+            elapsed = time.perf_counter() - start
+            print(f"  [{done}/{len(tasks)}] {elapsed:.0f}s, {done / len(tasks) * cells / elapsed:,.0f} cells/s",
+                  flush=True)
+
+    meta = {
+        "axes": {name: list(axes[name]) for name in AXIS_NAMES},
+        "labels": labels,
+        "soils": soils,
+        "model_sha256": file_sha256(model_path),
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(os.path.join(directory, "grid.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # A directory cannot be os.replace'd over a non-empty one: move the old grid aside first. Readers that
+    # already mapped it keep their mappings; one opening the grid in between finds none and uses the model.
+    old = f"{final}.old-{os.getpid()}"
+    if os.path.exists(final):
+        os.rename(final, old)
+    os.rename(directory, final)
+    shutil.rmtree(old, ignore_errors=True)
+    print(f"Grid written to {final} in {time.perf_counter() - start:.1f}s")
+
+
+# ======================
+# Agreement check
+# ======================
+def check_agreement(grid, samples=10000, mode="nearest", model_path=MODEL_PATH, seed=0):
+    """
+    Disagreement rate between the grid and the live model on random inputs
+    drawn uniformly from the grid's domain. Returns {soil: rate, "overall": rate}.
+    """
+    data = joblib.load(model_path)
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.uniform(grid.axes[name][0], grid.axes[name][1], samples) for name in AXIS_NAMES}
+    soils = rng.choice(grid.soils, samples)
+    soil_codes = data["soil_encoder"].transform(soils)
+
+    features = np.column_stack([columns[f] for f in FEATURE_ORDER] + [soil_codes])
+    live = data["model"].predict(data["scaler"].transform(features))
+    looked_up = np.array([
+        grid.lookup(soil, *(columns[a][i] for a in AXIS_NAMES), mode=mode) for i, soil in enumerate(soils)
+    ])
+
+    disagree = live != looked_up
+    report = {soil: float(disagree[soils == soil].mean()) for soil in grid.soils}
+    report["overall"] = float(disagree.mean())
+    return report
+
+
+def _parse_axis(text):
+    name, _, spec = text.partition("=")
+    if name not in DEFAULT_AXES:
+        raise argparse.ArgumentTypeError(f"unknown axis '{name}' (choose from {', '.join(AXIS_NAMES)})")
+    start, stop, step = (float(v) for v in spec.split(":"))
+    return name, (start, stop, step)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or check the precomputed crop recommendation grid")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build")
+    build.add_argument("--out", default=GRID_DIR)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--axis", type=_parse_axis, action="append", default=[],
+                       help="override an axis as name=start:stop:step, e.g. N=0:200:10")
+    build.add_argument("--check", type=int, default=5000, help="agreement samples after building (0 to skip)")
+
+    check = sub.add_parser("check")
+    check.add_argument("--grid", default=GRID_DIR)
+    check.add_argument("--samples", type=int, default=10000)
+    check.add_argument("--mode", choices=["nearest", "multilinear"], default="nearest")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build_grid(args.out, dict(args.axis), args.workers)
+        grid_dir, samples, modes = args.out, args.check, ["nearest", "multilinear"]
+    else:
+        grid_dir, samples, modes = args.grid, args.samples, [args.mode]
+
+    if samples:
+        grid = RecommendationGrid(grid_dir)
+        for mode in modes:
+            report = check_agreement(grid, samples, mode)
+            print(f"Disagreement with live model ({mode}): {report.pop('overall') * 100:.2f}%")
+            for soil, rate in report.items():
+                print(f"  {soil!r:<12} {rate * 100:.2f}%")
@@ -0,0 +1,331 @@
+"""
+Incremental refresh of the crop and irrigation models from field feedback.
+
+Instead of retraining from the full CSV, a batch of labelled outcomes keeps
+boosting from the booster already saved in models/ (xgb.train with
+xgb_model=...). Rows are weighted by observed yield, so good outcomes pull
+harder than poor ones. The existing scaler and encoders are reused.
+
+A full refit of the encoders, scaler and model, on the base dataset plus
+the feedback, only happens when the feedback has a soil type, crop or
+irrigation type the saved encoders do not know: XGBoost cannot add classes
+to a booster, and LabelEncoder codes would shift.
+
+Before publishing, the old and new models are scored on a held-out slice of
+the feedback and, to catch forgetting, on the base dataset's test split as
+the training scripts drew it. The new bundle is published only if neither
+accuracy drops by more than --tolerance: registered and made CURRENT in the
+model registry when the model is managed there (model_registry.py), else
+written atomically over the bare file in models/. The app picks it up
+either way.
+
+Feedback columns:
+    crop              N, P, K, temperature, humidity, ph, rainfall, soil,
+                      label (crop actually grown; "crop" also accepted)
+    water_fertilizer  Crop, N, P, K, pH, Irrigation
+    both, optional    yield (observed), expected_yield
+
+    python refresh_models.py crop feedback.csv
+    python refresh_models.py water_fertilizer irrigation_feedback.csv --rounds 10
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from xgboost import XGBClassifier
+
+from model_artifacts import booster_to_classifier, save_bundle, training_params
+from model_registry import ModelPointer, current, register
+
+HERE = os.path.dirname(__file__)
+ROUNDS = 20
+LEARNING_RATE_SCALE = 0.5  # added rounds take smaller steps than the original fit
+HOLDOUT = 0.2
+REPLAY_ROWS = 2000         # base training rows mixed into each update
+BASE_VALID_ROWS = 5000     # rows of the base test split scored to check for forgetting
+TOLERANCE = 0.01           # about 1.5 standard errors of accuracy on a 5000-row slice
+WEIGHT_RANGE = (0.25, 2.0)
+
+
+class NewCategories(Exception):
+    """Feedback has categories the saved encoders do not know."""
+
+
+def _pickle_dump(bundle, path):
+    with open(path, "wb") as f:
+        pickle.dump(bundle, f)
+
+
+def _check_categories(bundle, frame, categories):
+    for column, encoder in categories.items():
+        unknown = set(frame[column]) - set(bundle[encoder].classes_)
+        if unknown:
+            raise NewCategories(f"new {column} values: {sorted(unknown)}")
+
+
+def _known_rows(bundle, frame, categories):
+    known = np.ones(len(frame), dtype=bool)
+    for column, encoder in categories.items():
+        known &= frame[column].isin(bundle[encoder].classes_).to_numpy()
+    return known
+
+
+# ======================
+# Crop recommendation model
+# ======================
+CROP_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'Soil_encoded']
+CROP_CATEGORIES = {"soil": "soil_encoder", "label": "label_encoder"}
+
+
+def crop_xy(bundle, frame):
+    """Scaled features and encoded labels, with the bundle's own encoders."""
+    _check_categories(bundle, frame, CROP_CATEGORIES)
+    X = frame[CROP_FEATURES[:-1]].to_numpy(dtype=float)
+    X = np.column_stack([X, bundle["soil_encoder"].transform(frame["soil"])])
+    return bundle["scaler"].transform(X), bundle["label_encoder"].transform(frame["label"])
+
+
+def crop_refit(frame, weights):
+    """train_crop_recommendation_model.py on `frame`, with sample weights."""
+    soil_encoder = LabelEncoder().fit(frame["soil"])
+    label_encoder = LabelEncoder().fit(frame["label"])
+    X = frame[CROP_FEATURES[:-1]].to_numpy(dtype=float)
+    X = np.column_stack([X, soil_encoder.transform(frame["soil"])])
+    scaler = StandardScaler().fit(X)
+    model = XGBClassifier(
+        n_estimators=150, learning_rate=0.04, max_depth=6, subsample=0.7, colsample_bytree=0.4, gamma=0.03,
+        random_state=42, eval_metric="mlogloss",
+    )
+    model.fit(scaler.transform(X), label_encoder.transform(frame["label"]), sample_weight=weights)
+    return {'model': model, 'scaler': scaler, 'label_encoder': label_encoder, 'soil_encoder': soil_encoder}
+
+
+def crop_split(base):
+    """Row positions of the train/test split train_crop_recommendation_model.py used."""
+    return train_test_split(np.arange(len(base)), test_size=0.2, random_state=42, stratify=base["label"])
+
+
+def crop_feedback(frame):
+    frame = frame.rename(columns={"crop": "label"})
+    frame["soil"] = frame["soil"].astype(str)
+    return frame
+
+
+# ======================
+# Water & fertilizer (irrigation) model
+# ======================
+WATER_FEATURES = ['Crop_encoded', 'N', 'P', 'K', 'pH']
+WATER_CATEGORIES = {"Crop": "crop_encoder", "Irrigation": "irrigation_encoder"}
+
+
+def water_xy(bundle, frame):
+    _check_categories(bundle, frame, WATER_CATEGORIES)
+    X = np.column_stack([bundle["crop_encoder"].transform(frame["Crop"]), frame[WATER_FEATURES[1:]].to_numpy(float)])
+    return X, bundle["irrigation_encoder"].transform(frame["Irrigation"])
+
+
+def water_split(base):
+    """Row positions of the train/test split train_water_fertilizer_model.py used."""
+    return train_test_split(np.arange(len(base)), test_size=0.1, random_state=42)
+
+
+def water_refit(frame, weights):
+    """train_water_fertilizer_model.py on `frame`, with sample weights."""
+    crop_encoder = LabelEncoder().fit(frame["Crop"])
+    irrigation_encoder = LabelEncoder().fit(frame["Irrigation"])
+    notes_encoder = LabelEncoder().fit(frame["Notes"].fillna(""))
+    X = np.column_stack([crop_encoder.transform(frame["Crop"]), frame[WATER_FEATURES[1:]].to_numpy(float)])
+    model = XGBClassifier(eval_metric='mlogloss', random_state=42)
+    model.fit(pd.DataFrame(X, columns=WATER_FEATURES), irrigation_encoder.transform(frame["Irrigation"]),
+              sample_weight=weights)
+    return {
+        "model": model,
+        "crop_encoder": crop_encoder,
+        "irrigation_encoder": irrigation_encoder,
+        "notes_encoder": notes_encoder
+    }
+
+
+MODELS = {
+    "crop": {
+        "registry": "crop_recommendation",
+        "base_data": os.path.join(HERE, "datasets", "Crop_recommendation.csv"),
+        "label": "label",
+        "prepare": crop_feedback,
+        "split": crop_split,
+        "xy": crop_xy,
+        "known": lambda bundle, frame: _known_rows(bundle, frame, CROP_CATEGORIES),
+        "refit": crop_refit,
+        "dump": joblib.dump,
+    },
+    "water_fertilizer": {
+        "registry": "water_fertilizer",
+        "base_data": os.path.join(HERE, "datasets", "crop_water_fertilizer_plan.csv"),
+        "label": "Crop",
+        "prepare": lambda frame: frame,
+        "split": water_split,
+        "xy": water_xy,
+        "known": lambda bundle, frame: _known_rows(bundle, frame, WATER_CATEGORIES),
+        "refit": water_refit,
+        "dump": _pickle_dump,
+    },
+}
+
+
+# ======================
+# Refresh
+# ======================
+def yield_weights(frame, crop_column):
+    """
+    Observed yield relative to expected_yield (or to the batch median for
+    that crop), clipped to WEIGHT_RANGE; 1 where no yield was reported.
+    """
+    if "yield" not in frame.columns:
+        return np.ones(len(frame))
+    observed = pd.to_numeric(frame["yield"], errors="coerce")
+    if "expected_yield" in frame.columns:
+        expected = pd.to_numeric(frame["expected_yield"], errors="coerce")
+    else:
+        expected = observed.groupby(frame[crop_column]).transform("median")
+    ratio = (observed / expected).replace([np.inf, -np.inf], np.nan)
+    return ratio.clip(*WEIGHT_RANGE).fillna(1.0).to_numpy()
+
+
+def _accuracy(model, X, y):
+    return float(accuracy_score(y, model.predict(X))) if len(y) else None
+
+
+def continue_boosting(model, X, y, weights, rounds, learning_rate_scale=LEARNING_RATE_SCALE):
+    """Add `rounds` trees to the model's booster, trained on (X, y), with its own training parameters."""
+    booster = model.get_booster()
+    params = dict(training_params(model), num_class=int(model.n_classes_))
+    params["learning_rate"] *= learning_rate_scale
+    dtrain = xgb.DMatrix(X, label=y, weight=weights, feature_names=booster.feature_names)
+    return xgb.train(params, dtrain, num_boost_round=rounds, xgb_model=booster)
+
+
+def refresh(kind, feedback, rounds=ROUNDS, base_path=None, model_path=None, holdout=HOLDOUT,
+            replay_rows=REPLAY_ROWS, base_valid_rows=BASE_VALID_ROWS, tolerance=TOLERANCE, seed=42,
+            learning_rate_scale=LEARNING_RATE_SCALE, publish=True, force=False):
+    """Refresh one model from a feedback DataFrame; returns a report dict."""
+    spec = MODELS[kind]
+    # Default: the model the app is serving (registry CURRENT, else the bare file in models/)
+    in_registry = model_path is None and current(spec["registry"]) is not None
+    model_path = model_path or ModelPointer(spec["registry"]).resolve()[1]
+    base_path = base_path or spec["base_data"]
+    start = time.perf_counter()
+    rng, base_rng = np.random.default_rng(seed), np.random.default_rng(seed + 1)
+
+    bundle = joblib.load(model_path)
+    feedback = spec["prepare"](feedback.copy()).reset_index(drop=True)
+    weights = yield_weights(feedback, spec["label"])
+    is_holdout = rng.random(len(feedback)) < holdout
+    # Check for forgetting on the rows the saved model was validated on, replay rows it was trained on
+    base = spec["prepare"](pd.read_csv(base_path))
+    train_rows, test_rows = spec["split"](base)
+    base_valid = base.iloc[np.sort(base_rng.permutation(test_rows)[:base_valid_rows])]
+    base_rest = base.iloc[base_rng.permutation(train_rows)]
+    report = {"model": kind, "feedback_rows": len(feedback), "holdout_rows": int(is_holdout.sum())}
+
+    try:
+        X_fb, y_fb = spec["xy"](bundle, feedback)
+        X_base, y_base = spec["xy"](bundle, base_valid)
+    except NewCategories as e:
+        # Refit from scratch; the old model cannot score new classes, so it is compared on the base slice only
+        report.update(mode="refit", reason=str(e))
+        train = pd.concat([base_rest, feedback[~is_holdout]], ignore_index=True)  # base_valid stays out
+        train_weights = np.r_[np.ones(len(base_rest)), weights[~is_holdout]]
+        new_bundle = spec["refit"](train, train_weights)
+        X_base_old, y_base_old = spec["xy"](bundle, base_valid)
+        report["old_base_accuracy"] = _accuracy(bundle["model"], X_base_old, y_base_old)
+        # Holdout rows may carry categories that only occur in the holdout
+        known = spec["known"](new_bundle, feedback)
+        X_fb, y_fb = spec["xy"](new_bundle, feedback[known])
+        is_holdout = is_holdout[known]
+        X_base, y_base = spec["xy"](new_bundle, base_valid)
+        report["old_feedback_accuracy"] = None
+    else:
+        report["mode"] = "incremental"
+        replay = base_rest.iloc[:replay_rows]
+        X_replay, y_replay = spec["xy"](bundle, replay)
+        X_train = np.vstack([X_fb[~is_holdout], X_replay])
+        y_train = np.r_[y_fb[~is_holdout], y_replay]
+        w_train = np.r_[weights[~is_holdout], np.ones(len(y_replay))]
+        booster = continue_boosting(bundle["model"], X_train, y_train, w_train, rounds, learning_rate_scale)
+        report["old_feedback_accuracy"] = _accuracy(bundle["model"], X_fb[is_holdout], y_fb[is_holdout])
+        report["old_base_accuracy"] = _accuracy(bundle["model"], X_base, y_base)
+        # Record the model's own (unscaled) parameters, so the next refresh starts from them again
+        new_bundle = dict(bundle, model=booster_to_classifier(booster, training_params(bundle["model"])))
+        report["rounds"] = rounds
+
+    model = new_bundle["model"]
+    report["new_feedback_accuracy"] = _accuracy(model, X_fb[is_holdout], y_fb[is_holdout])
+    report["new_base_accuracy"] = _accuracy(model, X_base, y_base)
+    report["seconds"] = time.perf_counter() - start
+
+    regressions = [
+        name for name in ("feedback", "base")
+        if report[f"old_{name}_accuracy"] is not None and report[f"new_{name}_accuracy"] is not None
+        and report[f"new_{name}_accuracy"] < report[f"old_{name}_accuracy"] - tolerance
+    ]
+    report["regressions"] = regressions
+    report["published"] = bool(publish and (force or not regressions))
+    if report["published"] and in_registry:
+        metrics = {k: v for k, v in report.items() if k.endswith("_accuracy") and v is not None}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "artifact.pkl")
+            spec["dump"](new_bundle, path)
+            report["version"] = register(spec["registry"], path, dict(metrics, refresh=report["mode"]),
+                                         [base_path], activate=True)["version"]
+    elif report["published"]:
+        save_bundle(model_path, new_bundle, spec["dump"])
+    return report
+
+
+def _pct(value):
+    return "n/a" if value is None else f"{value * 100:.2f}%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh a saved model from a batch of field feedback")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("feedback", help="CSV of labelled outcomes")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="boosting rounds to add")
+    parser.add_argument("--learning-rate-scale", type=float, default=LEARNING_RATE_SCALE,
+                        help="learning rate of the added rounds, relative to the model's")
+    parser.add_argument("--model-path", help="bundle to refresh in place (default: the app's current model)")
+    parser.add_argument("--base-data", help="base training CSV (default: the model's dataset)")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT, help="fraction of feedback kept for validation")
+    parser.add_argument("--replay-rows", type=int, default=REPLAY_ROWS, help="base rows mixed into the update")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed accuracy drop")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dry-run", action="store_true", help="validate but do not publish")
+    parser.add_argument("--force", action="store_true", help="publish even if validation regresses")
+    args = parser.parse_args()
+
+    report = refresh(
+        args.model, pd.read_csv(args.feedback), args.rounds, args.base_data, args.model_path, args.holdout,
+        args.replay_rows, tolerance=args.tolerance, seed=args.seed, learning_rate_scale=args.learning_rate_scale,
+        publish=not args.dry_run, force=args.force,
+    )
+    print(f" {report['mode'].title()} refresh of the {args.model} model from {report['feedback_rows']} rows "
+          f"in {report['seconds']:.1f}s" + (f" ({report['reason']})" if report["mode"] == "refit" else ""))
+    print(f" Feedback holdout ({report['holdout_rows']} rows): {_pct(report['old_feedback_accuracy'])} -> "
+          f"{_pct(report['new_feedback_accuracy'])}")
+    print(f" Base slice: {_pct(report['old_base_accuracy'])} -> {_pct(report['new_base_accuracy'])}")
+    if report["published"]:
+        print(" Published" + (f" as version {report['version']}" if "version" in report else "")
+              + (" (forced)" if report["regressions"] else ""))
+    elif report["regressions"]:
+        print(f" Not published: accuracy dropped on {', '.join(report['regressions'])} (use --force to override)")
+    else:
+        print(" Not published (dry run)")
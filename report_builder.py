@@ -0,0 +1,259 @@
+"""
+PDF report rendering for the Report Generator page.
+
+build_report_pdf() turns the session's results into a ReportLab PDF.
+ReportService renders in a small pool of worker processes, so the Streamlit
+script thread never blocks on it; processes rather than threads because
+ReportLab keeps module-level state and is not documented as thread-safe.
+Reports are keyed by a sha256 of their inputs (results and language), so an
+unchanged session is served from a bounded LRU cache, and concurrent
+requests for the same report share one render.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import partial
+
+from cache_utils import LRUCache
+from resources import get_resource
+
+REPORT_WORKERS = int(os.environ.get("AGRIINTEL_REPORT_WORKERS", 2))
+REPORT_CACHE_SIZE = int(os.environ.get("AGRIINTEL_REPORT_CACHE_SIZE", 32))
+
+# Bump when the PDF layout changes, so cached reports are not reused
+REPORT_FORMAT = 3
+
+# Session keys that make up a report
+REPORT_FIELDS = ("recommended_crop", "water_plan", "companions", "rotation", "roi")
+
+
+def report_data(session_state):
+    """The report's inputs, taken from a session state mapping."""
+    data = {field: session_state.get(field, {}) for field in REPORT_FIELDS}
+    data["recommended_crop"] = session_state.get("recommended_crop", "Not calculated")
+    return data
+
+
+def report_key(data, lang):
+    """Content hash of a report's inputs."""
+    payload = json.dumps({"format": REPORT_FORMAT, "lang": lang, "data": data}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_report_pdf(data, lang="en"):
+    """Render the report for `data` (see report_data) in language `lang`; returns PDF bytes."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    translations = get_resource("translations")
+
+    def t(key):
+        return translations.get(lang, {}).get(key, translations["en"].get(key, key))
+
+    rec = data.get("recommended_crop", "Not calculated")
+    water = data.get("water_plan", {})
+    companions = data.get("companions", {})
+    rotation = data.get("rotation", {})
+    roi = data.get("roi", {})
+
+    # Create PDF in-memory
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    normal = styles["Normal"]
+    heading = styles["Heading2"]
+    elements = []
+
+    elements.append(Paragraph(f'{t("AgriIntel — Comprehensive Report")}', styles['Title']))
+    # A cached report is served as first rendered, so the time is labelled as the render time
+    elements.append(Paragraph(f'{t("Generated")}: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', normal))
+    elements.append(Spacer(1, 12))
+
+    # Crop recommendation
+    elements.append(Paragraph(f'{t("1. Crop Recommendation")}', heading))
+    elements.append(Paragraph(f'{t("Recommended crop")}: {rec}', normal))
+    elements.append(Spacer(1, 8))
+
+    # Water & Fertilizer
+    elements.append(Paragraph(f'{t("2. Water & Fertilizer Plan")}', heading))
+    if water:
+        if "error" in water:
+            elements.append(Paragraph(f'{t("Planner Error")}'+":"+f"{water.get('error')}", normal))
+        else:
+            elements.append(Paragraph(f'{t("Irrigation")}'+":"+f"{water.get('irrigation', 'N/A')}", normal))
+            gaps = water.get("nutrient_gaps", {})
+            recnpk = water.get("recommended_NPK", {})
+            elements.append(Paragraph(f'{t("Recommended NPK (kg/ha)")}'+":"+f"N:{recnpk.get('N','-')}, P:{recnpk.get('P','-')}, K:{recnpk.get('K','-')}", normal))
+            elements.append(Paragraph(f'{t("NPK Gaps (kg/ha)")}'+":"+f"N:{round(gaps.get('N',0),2)}, P:{round(gaps.get('P',0),2)}, K:{round(gaps.get('K',0),2)}", normal))
+            elements.append(Paragraph(f'{t("Notes")}'+":"+f"{water.get('notes','')}", normal))
+    else:
+        elements.append(Paragraph(f'{t("No water & fertilizer plan available in this session")}', normal))
+    elements.append(Spacer(1, 8))
+
+    # Companion
+    elements.append(Paragraph(f'{t("3. Companion Crop Planner")}', heading))
+    if companions:
+        if "error" in companions:
+            elements.append(Paragraph(f'{t("Companion Error")}'+":"+f"{companions.get('error')}", normal))
+        else:
+            elements.append(Paragraph(f'{t("Companion Crops")}'+":"+f"{', '.join(companions.get('companions', []))}", normal))
+            elements.append(Paragraph(f'{t("Notes")}'+":"+f"{companions.get('notes','')}", normal))
+    else:
+        elements.append(Paragraph(f'{t("No companion data available in this session")}', normal))
+    elements.append(Spacer(1, 8))
+
+    # Rotation
+    elements.append(Paragraph(f'{t("4. Crop Rotation Planner")}', heading))
+    if rotation:
+        if "error" in rotation:
+            elements.append(Paragraph(f'{t("Rotation Error")}'+":"+f"{rotation.get('error')}", normal))
+        else:
+            elements.append(Paragraph(f'{t("Next Crops")}'+":" +f"{', '.join(rotation.get('next', []))}", normal))
+            elements.append(Paragraph(f'{t("Notes")}'+":"+ f"{rotation.get('note','')}", normal))
+    else:
+        elements.append(Paragraph(f'{t("No rotation data available in this session")}', normal))
+    elements.append(Spacer(1, 8))
+
+    # ROI
+    elements.append(Paragraph(f'{t("5. ROI Summary")}', heading))
+    if roi:
+        farm_size = roi.get("farm_size", 0)
+        total_yield_kg = roi.get("total_yield_kg", None)
+        revenue = roi.get("revenue", 0)
+        total_cost = roi.get("total_cost", roi.get("total_cost", roi.get("total_cost", 0)))
+        profit = roi.get("profit", 0)
+
+        data = [
+            [f'{t("Farm Size (ha)")}', f'{t("Yield (kg)")}', f'{t("Revenue (₹)")}', f'{t("Total Cost (₹)")}', f'{t("Profit (₹)")}'],
+            [f"{farm_size:.4f}", f"{total_yield_kg:.2f}" if total_yield_kg else "-", f"{revenue:.2f}", f"{total_cost:.2f}", f"{profit:.2f}"]
+        ]
+        table = Table(data, hAlign='LEFT')
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#dfeadf')),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('ALIGN',(2,0),(4,1),'RIGHT')
+        ]))
+        elements.append(table)
+    else:
+        elements.append(Paragraph(f'{t("No ROI data available in this session")}', normal))
+
+    elements.append(Spacer(1, 12))
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+class ReportService:
+    """
+    Renders reports in worker processes, keyed by report_key().
+
+    submit() returns at once; ready reports live in an LRU cache of PDF bytes
+    and renders still running are tracked so a second submit joins them.
+    `builder` runs in the workers, so it must be a module-level function.
+    """
+
+    def __init__(self, workers=REPORT_WORKERS, cache_size=REPORT_CACHE_SIZE, builder=build_report_pdf):
+        self.builder = builder
+        self.workers = workers
+        self.cache = LRUCache(cache_size)
+        self._executor = None  # started on the first submit
+        self._pending = {}  # key -> Event set once the result (or error) is stored
+        self._errors = LRUCache(cache_size)
+        self._lock = threading.Lock()
+
+    def _submit(self, data, lang):
+        # Spawned, not forked: the Streamlit process is multi-threaded
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            return self._executor.submit(self.builder, data, lang)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor.submit(self.builder, data, lang)
+
+    def submit(self, data, lang="en"):
+        """Start rendering (unless cached or already running). Returns the report key."""
+        key = report_key(data, lang)
+        with self._lock:
+            if key in self._pending or self.cache.get(key) is not None:
+                return key
+            self._errors.pop(key)
+            self._pending[key] = threading.Event()
+            try:
+                future = self._submit(data, lang)
+            except BaseException:
+                self._pending.pop(key).set()
+                raise
+        # Outside the lock: the callback runs at once if the future is already done
+        future.add_done_callback(partial(self._finish, key))
+        return key
+
+    def _finish(self, key, future):
+        try:
+            self.cache.put(key, future.result())
+        except Exception as e:
+            self._errors.put(key, e)
+        finally:
+            with self._lock:
+                done = self._pending.pop(key, None)
+            if done is not None:
+                done.set()
+
+    def status(self, key):
+        """"ready", "pending", "failed" or "missing"."""
+        if self.cache.get(key) is not None:
+            return "ready"
+        with self._lock:
+            if key in self._pending:
+                return "pending"
+        return "failed" if self._errors.get(key) is not None else "missing"
+
+    def result(self, key):
+        """PDF bytes if ready, else None."""
+        return self.cache.get(key)
+
+    def error(self, key):
+        return self._errors.get(key)
+
+    def wait(self, key, timeout=None):
+        """Block until a submitted report finishes; returns its PDF bytes (or None)."""
+        with self._lock:
+            done = self._pending.get(key)
+        if done is not None and not done.wait(timeout):
+            raise TimeoutError(f"report {key[:12]} not ready after {timeout}s")
+        return self.result(key)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return dict(self.cache.stats(), pending=pending)
+
+
+# Shared by every session in the process
+report_service = ReportService()
+
+
+# Quick test
+if __name__ == "__main__":
+    import time
+
+    sample = {
+        "recommended_crop": "Rice",
+        "water_plan": {"irrigation": "Drip Irrigation", "recommended_NPK": {"N": 120, "P": 60, "K": 40},
+                       "nutrient_gaps": {"N": 30, "P": 10, "K": 0}, "notes": "Split N doses."},
+        "companions": {}, "rotation": {}, "roi": {},
+    }
+    for attempt in range(2):
+        start = time.perf_counter()
+        key = report_service.submit(sample, "en")
+        pdf = report_service.wait(key)
+        print(f"Attempt {attempt + 1}: {len(pdf):,} bytes in {(time.perf_counter() - start) * 1e3:.1f}ms "
+              f"({report_service.stats()})")
@@ -0,0 +1,64 @@
+"""
+Rerun latency instrumentation for app.py.
+
+Full script runs and fragment reruns are timed separately, so the effect of
+fragment-scoped reruns can be compared on a live deployment. Timings are
+kept per process (last HISTORY runs per section). When
+AGRIINTEL_RERUN_TIMING=1 each run is also logged to stdout and app.py shows
+a summary in the sidebar.
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("AGRIINTEL_RERUN_TIMING", "0") == "1"
+# AGRIINTEL_FRAGMENTS=0 reruns the whole script on every widget change, as
+# before fragments, so both can be timed on the same tree (bench_rerun_latency.py)
+FRAGMENTS = os.environ.get("AGRIINTEL_FRAGMENTS", "1") == "1"
+HISTORY = 500
+
+_timings = {}
+_lock = threading.Lock()
+
+
+def record(name, seconds):
+    with _lock:
+        _timings.setdefault(name, deque(maxlen=HISTORY)).append(seconds)
+    if ENABLED:
+        print(f"[rerun] {name}: {seconds * 1e3:.1f}ms")
+
+
+def timed(name):
+    """Decorator recording how long each call of a section takes."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _percentile(sorted_values, q):
+    # Nearest-rank percentile; keeps numpy out of the app shell's imports
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+def summary():
+    """{section: {"runs", "p50_ms", "p95_ms"}} over the recorded history."""
+    with _lock:
+        snapshot = {name: sorted(v * 1e3 for v in values) for name, values in _timings.items()}
+    return {
+        name: {"runs": len(ms), "p50_ms": _percentile(ms, 50), "p95_ms": _percentile(ms, 95)}
+        for name, ms in snapshot.items() if ms
+    }
+
+
+def reset():
+    with _lock:
+        _timings.clear()
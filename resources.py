@@ -0,0 +1,179 @@
+"""
+Process-wide registry of the app's small data files.
+
+Streamlit reruns app.py top to bottom on every interaction, so anything
+loaded there is reloaded per click and per session. The registry loads each
+resource once per process, shares it across sessions, and reloads it only
+when its file changes: on get() the file is stat'ed (at most every
+CHECK_INTERVAL seconds) and a changed mtime/size triggers a reload. With
+AGRIINTEL_RESOURCE_CHECK=hash, a changed mtime is confirmed by the file's
+sha256 first, so a touch or a re-checkout of identical content is free.
+
+Resources are LazyResources underneath, so load timings also show up in
+model_loader.load_timings(); stats() adds paths, reload counts and an
+estimate of each value's memory size.
+"""
+import ast
+import json
+import os
+import sys
+import threading
+import time
+
+from cache_utils import file_sha256
+from model_loader import LazyResource
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECK_MODE = os.environ.get("AGRIINTEL_RESOURCE_CHECK", "mtime")  # or "hash"
+CHECK_INTERVAL = float(os.environ.get("AGRIINTEL_RESOURCE_CHECK_INTERVAL", 1.0))
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _sha256(path):
+    try:
+        return file_sha256(path)
+    except OSError:
+        return None
+
+
+def deep_sizeof(value, _seen=None):
+    """Approximate memory held by a value (DataFrames, containers, strings)."""
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, _seen) for v in value)
+    return size
+
+
+class FileResource:
+    """One registered file: a LazyResource plus the file state it was loaded from."""
+
+    def __init__(self, name, path, loader, check=CHECK_MODE):
+        self.name = name
+        self.path = path
+        self.check = check
+        self.loads = 0
+        self.fingerprint = None
+        self.sha256 = None
+        self.size_bytes = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._loader = loader
+        self.resource = LazyResource(name, self._load)
+
+    def _load(self):
+        fingerprint = _fingerprint(self.path)
+        value = self._loader(self.path)
+        self.fingerprint = fingerprint
+        self.sha256 = _sha256(self.path) if self.check == "hash" else None
+        self.size_bytes = deep_sizeof(value)
+        self.loads += 1
+        return value
+
+    def _changed(self):
+        fingerprint = _fingerprint(self.path)
+        if fingerprint == self.fingerprint:
+            return False
+        if self.check == "hash" and self.sha256 is not None and _sha256(self.path) == self.sha256:
+            # Same content under a new mtime: remember it and keep the loaded value
+            self.fingerprint = fingerprint
+            return False
+        return True
+
+    def get(self):
+        if self.resource.loaded and time.monotonic() - self._checked_at >= CHECK_INTERVAL:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                if self._changed():
+                    self.resource.reset()
+        return self.resource.get()
+
+    def stats(self):
+        return dict(
+            self.resource.stats(),
+            path=os.path.relpath(self.path, BASE_DIR),
+            loads=self.loads,
+            size_bytes=self.size_bytes,
+            check=self.check,
+        )
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._resources = {}
+
+    def register(self, name, path, loader, check=CHECK_MODE):
+        self._resources[name] = FileResource(name, path, loader, check)
+        return self._resources[name]
+
+    def get(self, name):
+        return self._resources[name].get()
+
+    def stats(self):
+        return [r.stats() for r in self._resources.values()]
+
+
+# ======================
+# Loaders
+# ======================
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def python_literal(variable):
+    """
+    Loader for a dict/list literal assigned in a .py data module (e.g.
+    rotation_rules), read from source so edits are picked up without
+    re-importing the module.
+    """
+    def loader(path):
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == variable for t in node.targets):
+                return ast.literal_eval(node.value)
+        raise KeyError(f"{variable} not found in {path}")
+    return loader
+
+
+def _load_companions(path):
+    from crop_companion import read_companion_data
+
+    # Not load_companion_data: it returns None on errors, which would be cached as a successful load
+    return read_companion_data(path)
+
+
+registry = ResourceRegistry()
+registry.register("translations", os.path.join(BASE_DIR, "translations.json"), load_json)
+registry.register("yield_data", os.path.join(BASE_DIR, "datasets", "statewise_avg_yield.json"), load_json)
+registry.register("crop_companion", os.path.join(BASE_DIR, "datasets", "crop_companion.csv"), _load_companions)
+registry.register("rotation_rules", os.path.join(BASE_DIR, "crop_rotation_planner.py"),
+                  python_literal("rotation_rules"))
+registry.register("states_cities", os.path.join(BASE_DIR, "indian_states_cities.py"),
+                  python_literal("indian_states_cities"))
+
+
+def get_resource(name):
+    return registry.get(name)
+
+
+if __name__ == "__main__":
+    for name in list(registry._resources):
+        get_resource(name)
+    for s in registry.stats():
+        print(f"{s['name']:<16} {s['path']:<36} {s['load_seconds'] * 1e3:8.2f}ms  {s['size_bytes'] / 1024:8.1f} KiB")
@@ -0,0 +1,78 @@
+"""
+ROI arithmetic shared by the app's ROI page and bulk_reports.py.
+"""
+from resources import get_resource
+
+# Local land units in hectares
+AREA_UNITS = {
+    "Acre": 0.4047, "Guntha": 0.0101, "Bigha (Punjab)": 0.25,
+    "Bigha (UP)": 0.25, "Bigha (West Bengal)": 0.13, "Bigha (Assam)": 0.33,
+    "Vigha (Gujarat)": 0.16, "Kanal": 0.0506, "Marla": 0.0025,
+    "Cent": 0.0040, "Hectare": 1.0
+}
+
+
+def convert_to_hectare(area, unit):
+    if unit not in AREA_UNITS:
+        raise ValueError("Invalid unit")
+    return area * AREA_UNITS[unit]
+
+
+def state_yield(state, crop, yield_data=None):
+    """
+    Average yield for a crop in a state (tonnes/ha; nuts/ha for coconut).
+    Crop names are matched case-insensitively. Raises KeyError if unknown.
+    """
+    yield_data = get_resource("yield_data") if yield_data is None else yield_data
+    crops = yield_data.get(state)
+    if crops is None:
+        raise KeyError(f"No yield data for state '{state}'")
+    if crop in crops:
+        return crop, crops[crop]
+    by_name = {name.strip().lower(): name for name in crops}
+    name = by_name.get(str(crop).strip().lower())
+    if name is None:
+        raise KeyError(f"No yield data for '{crop}' in {state}")
+    return name, crops[name]
+
+
+def compute_roi(area, unit, state, crop, market_price, input_cost=0.0, irrigation_cost=0.0, labor_cost=0.0,
+                yield_data=None):
+    """
+    Revenue, cost and profit for a farm, as stored in st.session_state["roi"].
+
+    `market_price` is per kg, or per nut for coconut. Returns a dict with
+    farm_size (ha), crop, state, total_yield_kg (None for coconut),
+    total_units (coconut count, else None), revenue, total_cost, profit,
+    roi_percent (None without costs) and market_price.
+    """
+    crop, avg_yield = state_yield(state, crop, yield_data)
+    farm_size = convert_to_hectare(area, unit)
+    if crop.lower() == "coconut":
+        total_units = farm_size * avg_yield
+        total_yield_kg = None
+        revenue = market_price * total_units
+    else:
+        total_units = None
+        total_yield_kg = farm_size * avg_yield * 1000
+        revenue = market_price * total_yield_kg
+
+    total_cost = input_cost + irrigation_cost + labor_cost
+    profit = revenue - total_cost
+    return {
+        "farm_size": farm_size,
+        "crop": crop,
+        "state": state,
+        "total_yield_kg": total_yield_kg,
+        "total_units": total_units,
+        "revenue": revenue,
+        "total_cost": total_cost,
+        "profit": profit,
+        "roi_percent": (profit / total_cost * 100) if total_cost > 0 else None,
+        "market_price": market_price,
+    }
+
+
+# Quick test
+if __name__ == "__main__":
+    print(compute_roi(2, "Acre", "Andhra Pradesh", "rice", market_price=15, input_cost=40000, labor_cost=20000))
@@ -0,0 +1,255 @@
+"""
+Out-of-core training for the crop recommendation model.
+
+Same features, encoders, scaler and XGBoost settings as
+train_crop_recommendation_model.py, but the dataset is never loaded whole:
+
+  1. One streaming pass over the file collects the soil and crop label sets
+     and the scaler statistics (StandardScaler.partial_fit per chunk).
+  2. An xgboost.DataIter feeds scaled chunks to an ExtMemQuantileDMatrix,
+     which keeps quantized pages in an on-disk cache (or, with --in-memory,
+     a QuantileDMatrix, whose compressed pages stay in RAM).
+  3. xgb.train boosts over that matrix; the booster is wrapped as an
+     XGBClassifier and saved in the usual bundle.
+
+Feature data is held in chunks of --chunk-rows, whatever the dataset size.
+XGBoost itself still keeps gradient and prediction buffers of
+rows x classes floats in RAM (about 1 KB per training row with 79 crops,
+even with external memory), so for a hard memory bound pass
+--max-train-rows: training rows are then subsampled uniformly by hash.
+Every fifth row (by a hash of its row number) is held out for the test
+accuracy, in place of train_test_split.
+
+    python train_crop_recommendation_model_streaming.py --data datasets/big.parquet --out models/big.pkl
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from model_artifacts import booster_to_classifier, save_bundle
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "datasets", "Crop_recommendation.csv")
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "crop_recommendation_model.pkl")
+NUMERIC = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+CHUNK_ROWS = 500_000
+TEST_SIZE = 0.2
+
+# As in train_crop_recommendation_model.py
+PARAMS = {
+    "learning_rate": 0.04,
+    "max_depth": 6,
+    "subsample": 0.7,
+    "colsample_bytree": 0.4,
+    "gamma": 0.03,
+    "seed": 42,
+    "objective": "multi:softprob",
+    "eval_metric": "mlogloss",
+    "tree_method": "hist",
+}
+ROUNDS = 150
+
+
+# ======================
+# Chunked reading
+# ======================
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield (first row number, DataFrame) chunks of a CSV or Parquet file."""
+    columns = NUMERIC + ["soil", "label"]
+    start = 0
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        # pre_buffer would keep every column chunk read so far alive until the file is closed
+        parquet = pq.ParquetFile(path, pre_buffer=False)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            chunk = batch.to_pandas()
+            yield start, chunk
+            start += len(chunk)
+        return
+    dtypes = dict.fromkeys(NUMERIC, np.float32)
+    for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_rows):
+        yield start, chunk
+        start += len(chunk)
+
+
+def row_hash(start, n):
+    """Multiplicative hash of row numbers in [0, 2**32); stable across chunk sizes."""
+    rows = np.arange(start, start + n, dtype=np.uint64)
+    return rows * np.uint64(2654435761) % np.uint64(1 << 32)
+
+
+def holdout_mask(start, n, test_size=TEST_SIZE):
+    return row_hash(start, n) < np.uint64(test_size * (1 << 32))
+
+
+def train_mask(start, n, fraction=1.0, test_size=TEST_SIZE):
+    """Non-test rows, keeping a uniform `fraction` of them."""
+    test_cut = test_size * (1 << 32)
+    h = row_hash(start, n)
+    return (h >= np.uint64(test_cut)) & (h < np.uint64(test_cut + fraction * ((1 << 32) - test_cut)))
+
+
+# ======================
+# Pass 1: encoders and scaler
+# ======================
+def fit_preprocessing(path, chunk_rows=CHUNK_ROWS):
+    """Soil and label encoders plus the 8-column scaler, from one streaming pass."""
+    numeric = StandardScaler()
+    soil_counts = pd.Series(dtype=np.int64)
+    labels = set()
+    for _, chunk in iter_chunks(path, chunk_rows):
+        numeric.partial_fit(chunk[NUMERIC].to_numpy())
+        soil_counts = soil_counts.add(chunk["soil"].value_counts(), fill_value=0)
+        labels.update(chunk["label"].unique())
+
+    soil_encoder = LabelEncoder().fit(soil_counts.index.to_numpy())
+    label_encoder = LabelEncoder().fit(np.array(sorted(labels), dtype=object))
+
+    # Soil_encoded moments follow from the per-class counts
+    counts = soil_counts.reindex(soil_encoder.classes_).to_numpy(dtype=float)
+    codes = np.arange(len(counts), dtype=float)
+    soil_mean = (counts * codes).sum() / counts.sum()
+    soil_var = (counts * (codes - soil_mean) ** 2).sum() / counts.sum()
+
+    scaler = StandardScaler()
+    scaler.mean_ = np.append(numeric.mean_, soil_mean)
+    scaler.var_ = np.append(numeric.var_, soil_var)
+    scale = np.sqrt(scaler.var_)
+    scaler.scale_ = np.where(scale == 0, 1.0, scale)
+    scaler.n_samples_seen_ = int(numeric.n_samples_seen_)
+    scaler.n_features_in_ = len(NUMERIC) + 1
+    return scaler, soil_encoder, label_encoder
+
+
+def transform(chunk, scaler, soil_encoder, label_encoder):
+    features = np.column_stack([chunk[NUMERIC].to_numpy(), soil_encoder.transform(chunk["soil"])])
+    return scaler.transform(features).astype(np.float32), label_encoder.transform(chunk["label"])
+
+
+# ======================
+# Pass 2: boosting over a data iterator
+# ======================
+class ChunkIter(xgb.DataIter):
+    """Feeds the training rows of each chunk to XGBoost, re-reading the file on every reset()."""
+
+    def __init__(self, path, chunk_rows, preprocessing, fraction=1.0, cache_prefix=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.preprocessing = preprocessing
+        self.fraction = fraction
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_chunks(self.path, self.chunk_rows)
+        for start, chunk in self._chunks:
+            chunk = chunk[train_mask(start, len(chunk), self.fraction)]
+            if len(chunk):
+                X, y = transform(chunk, *self.preprocessing)
+                input_data(data=X, label=y)
+                return True
+        return False
+
+    def reset(self):
+        self._chunks = None
+
+
+def test_accuracy(booster, path, chunk_rows, preprocessing):
+    correct = total = 0
+    for start, chunk in iter_chunks(path, chunk_rows):
+        chunk = chunk[holdout_mask(start, len(chunk))]
+        if not len(chunk):
+            continue
+        X, y = transform(chunk, *preprocessing)
+        correct += int((booster.inplace_predict(X).argmax(axis=1) == y).sum())
+        total += len(y)
+    return correct / total if total else float("nan")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def train(path, rounds=ROUNDS, chunk_rows=CHUNK_ROWS, in_memory=False, nthread=None, max_train_rows=None):
+    """Returns (bundle, report) for the dataset at `path`."""
+    report = {"data": path, "rounds": rounds, "chunk_rows": chunk_rows, "in_memory": in_memory,
+              "max_train_rows": max_train_rows}
+    start = time.perf_counter()
+    preprocessing = fit_preprocessing(path, chunk_rows)
+    scaler, soil_encoder, label_encoder = preprocessing
+    report["rows"] = int(scaler.n_samples_seen_)
+    report["preprocess_seconds"] = time.perf_counter() - start
+    fraction = 1.0
+    if max_train_rows:
+        fraction = min(1.0, max_train_rows / (report["rows"] * (1 - TEST_SIZE)))
+
+    cache_dir = None if in_memory else tempfile.mkdtemp(prefix="agriintel-xgb-")
+    try:
+        start = time.perf_counter()
+        if in_memory:
+            matrix = xgb.QuantileDMatrix(ChunkIter(path, chunk_rows, preprocessing, fraction), nthread=nthread)
+        else:
+            it = ChunkIter(path, chunk_rows, preprocessing, fraction, cache_prefix=os.path.join(cache_dir, "cache"))
+            matrix = xgb.ExtMemQuantileDMatrix(it, nthread=nthread)
+        report["matrix_seconds"] = time.perf_counter() - start
+        report["train_rows"] = int(matrix.num_row())
+
+        start = time.perf_counter()
+        params = dict(PARAMS, num_class=len(label_encoder.classes_))
+        if nthread:
+            params["nthread"] = nthread
+        booster = xgb.train(params, matrix, num_boost_round=rounds)
+        report["train_seconds"] = time.perf_counter() - start
+        del matrix
+    finally:
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    report["test_accuracy"] = test_accuracy(booster, path, chunk_rows, preprocessing)
+    report["evaluate_seconds"] = time.perf_counter() - start
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    bundle = {
+        'model': booster_to_classifier(booster, params),
+        'scaler': scaler,
+        'label_encoder': label_encoder,
+        'soil_encoder': soil_encoder
+    }
+    return bundle, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the crop recommendation model without loading the dataset")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV or Parquet dataset")
+    parser.add_argument("--out", default=MODEL_PATH)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--in-memory", action="store_true", help="QuantileDMatrix instead of external memory")
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--max-train-rows", type=int, default=None,
+                        help="subsample training rows to about this many (bounds XGBoost's own buffers)")
+    parser.add_argument("--report-json", help="also write timings and peak RSS to this file")
+    args = parser.parse_args()
+
+    bundle, report = train(args.data, args.rounds, args.chunk_rows, args.in_memory, args.nthread,
+                           args.max_train_rows)
+    save_bundle(args.out, bundle)
+
+    print(f" Trained on {report['train_rows']:,} of {report['rows']:,} rows: "
+          f"preprocess {report['preprocess_seconds']:.1f}s, matrix {report['matrix_seconds']:.1f}s, boosting {report['train_seconds']:.1f}s")
+    print(f" Test accuracy: {report['test_accuracy'] * 100:.2f}%  Peak RSS: {report['peak_rss_mb']:.0f} MB")
+    print(f" Model saved successfully at {args.out}")
+    if args.report_json:
+        with open(args.report_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,251 @@
+"""
+Pure-NumPy inference for the XGBoost models.
+
+compile_xgboost() flattens a trained booster into contiguous arrays (split
+feature, threshold, children, default direction, leaf value). CompiledForest
+then walks every tree at once with vectorized gathers, one tree level per
+step, for a single row or a batch.
+
+Inputs are cast to float32 and compared against float32 thresholds exactly as
+XGBoost does, and each class margin is accumulated sequentially in float32 in
+boosting order, starting from the base margin. In practice margins match
+XGBoost bit-for-bit; the guaranteed tolerance is MARGIN_ATOL, and
+compile_xgboost() verifies it on probe rows before returning.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MARGIN_ATOL = 1e-5
+
+# Opt-in switch for the single-row paths in predictor / water_fertilizer_plan.
+# Batches are faster through XGBoost itself, so predict_crops etc. keep using it.
+USE_COMPILED_TREES = os.environ.get("AGRIINTEL_COMPILED_TREES", "0") == "1"
+
+# Upper bound on rows x trees node indices held at once during batch evaluation
+_MAX_BLOCK = 4_000_000
+
+
+class CompiledForest:
+    """Flattened tree ensemble with a vectorized evaluator."""
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, n_classes,
+                 n_rounds, max_depth, base_margin):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.n_classes = int(n_classes)
+        self.n_rounds = int(n_rounds)
+        self.max_depth = int(max_depth)
+        self.base_margin = base_margin
+
+        # One 16-byte record per node, so each walking step is a single gather
+        # (default_left stays separate: it is only needed for rows with NaNs)
+        self.nodes = np.empty(len(feature), dtype=[
+            ("feature", np.int32), ("threshold", np.float32), ("left", np.int32), ("right", np.int32),
+        ])
+        self.nodes["feature"] = feature
+        self.nodes["threshold"] = threshold
+        self.nodes["left"] = left
+        self.nodes["right"] = right
+
+    # ======================
+    # Inference
+    # ======================
+    def leaf_values(self, X):
+        """Leaf value reached in every tree, shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        has_missing = np.isnan(X).any()
+        if len(X) == 1:
+            return self._leaf_values_row(X[0], has_missing)[None, :]
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            node = self.nodes[nodes]
+            x = X[rows, node["feature"]]
+            go_left = x < node["threshold"]
+            if has_missing:
+                go_left |= np.isnan(x) & self.default_left[nodes]
+            nodes = np.where(go_left, node["left"], node["right"])
+        return self.value[nodes]
+
+    def _leaf_values_row(self, x, has_missing):
+        # Single-row fast path: 1-D gathers are markedly cheaper than 2-D ones
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            node = self.nodes[nodes]
+            value = x[node["feature"]]
+            go_left = value < node["threshold"]
+            if has_missing:
+                go_left |= np.isnan(value) & self.default_left[nodes]
+            nodes = np.where(go_left, node["left"], node["right"])
+        return self.value[nodes]
+
+    def predict_margin(self, X):
+        """Raw margins, shape (rows, classes); (rows, 1) for binary models."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        block = max(1, _MAX_BLOCK // len(self.roots))
+        out = []
+        for start in range(0, len(X), block):
+            values = self.leaf_values(X[start:start + block])
+            # Trees are stored class-major, so this is (rows, classes, rounds)
+            values = values.reshape(len(values), self.n_classes, self.n_rounds)
+            base = np.broadcast_to(self.base_margin[None, :, None], (len(values), self.n_classes, 1))
+            # Sequential float32 sum in boosting order, like XGBoost's predictor
+            out.append(np.cumsum(np.concatenate([base, values], axis=2), axis=2, dtype=np.float32)[:, :, -1])
+        return np.concatenate(out) if out else np.empty((0, self.n_classes), dtype=np.float32)
+
+    def predict(self, X):
+        """Encoded class labels, same as XGBClassifier.predict."""
+        margin = self.predict_margin(X)
+        if self.n_classes == 1:
+            return (margin[:, 0] > 0).astype(np.int64)
+        return np.argmax(margin, axis=1)
+
+    # ======================
+    # Persistence
+    # ======================
+    def save(self, path):
+        np.savez(
+            path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            base_margin=self.base_margin,
+            meta=np.array([self.n_classes, self.n_rounds, self.max_depth]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            n_classes, n_rounds, max_depth = f["meta"]
+            return cls(f["feature"], f["threshold"], f["left"], f["right"], f["default_left"],
+                       f["value"], f["roots"], n_classes, n_rounds, max_depth, f["base_margin"])
+
+
+def compile_xgboost(model, probe=None):
+    """
+    Flatten an XGBClassifier (or Booster) into a CompiledForest.
+
+    `probe` is an optional array of rows used to calibrate the base margin
+    and check agreement with XGBoost; random rows are used when omitted.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    n_features = int(learner["learner_model_param"]["num_feature"])
+    gbtree = learner["gradient_booster"]
+    if "model" not in gbtree:
+        raise ValueError(f"Only gbtree boosters can be compiled, got {gbtree.get('name')}")
+    gbtree = gbtree["model"]
+    if int(gbtree["gbtree_model_param"].get("num_parallel_tree", 1)) != 1:
+        raise ValueError("Boosted random forests (num_parallel_tree > 1) are not supported")
+
+    trees = gbtree["trees"]
+    groups = np.asarray(gbtree["tree_info"], dtype=np.int64)
+    n_classes = int(groups.max()) + 1
+    n_rounds = len(trees) // n_classes
+    if n_rounds * n_classes != len(trees) or np.any(np.bincount(groups, minlength=n_classes) != n_rounds):
+        raise ValueError("Every class must have the same number of trees")
+
+    # Class-major order, boosting order within each class
+    order = np.argsort(groups, kind="stable")
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree_id in order:
+        tree = trees[tree_id]
+        if any(tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported")
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        n = len(lc)
+        node_ids = np.arange(n)
+        is_leaf = lc == -1
+
+        # Leaves point at themselves, so extra walking steps are no-ops
+        feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+        threshold.append(np.where(is_leaf, 0, tree["split_conditions"]))
+        left.append(np.where(is_leaf, node_ids, lc) + offset)
+        right.append(np.where(is_leaf, node_ids, rc) + offset)
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        value.append(np.where(is_leaf, tree["split_conditions"], 0))
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(lc, rc))
+        offset += n
+
+    forest = CompiledForest(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold).astype(np.float32),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value).astype(np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        n_classes=n_classes,
+        n_rounds=n_rounds,
+        max_depth=max_depth,
+        base_margin=np.zeros(n_classes, dtype=np.float32),
+    )
+
+    # Base margin: what XGBoost adds on top of the tree sums. Candidates are the
+    # stored base_score (and its logit, for binary:logistic) plus a value read
+    # back from the booster itself; keep whichever reproduces XGBoost best.
+    if probe is None:
+        probe = np.random.default_rng(0).normal(size=(256, n_features))
+    probe = np.asarray(probe, dtype=np.float32)
+    xgb_margin = booster.inplace_predict(probe, predict_type="margin", validate_features=False)
+    xgb_margin = np.asarray(xgb_margin).reshape(len(probe), -1)
+    tree_sum = forest.predict_margin(probe)
+
+    stored = np.atleast_1d(np.asarray(json.loads(learner["learner_model_param"]["base_score"]), dtype=np.float64))
+    candidates = [np.median(xgb_margin - tree_sum, axis=0)]
+    if stored.size in (1, n_classes):
+        candidates.append(np.broadcast_to(stored, n_classes))
+        if np.all((stored > 0) & (stored < 1)):
+            candidates.append(np.broadcast_to(np.log(stored / (1 - stored)), n_classes))
+
+    best_error = None
+    for candidate in candidates:
+        forest.base_margin = np.asarray(candidate, dtype=np.float32)
+        error = np.abs(forest.predict_margin(probe) - xgb_margin).max()
+        if best_error is None or error < best_error:
+            best_error, best = error, forest.base_margin
+    forest.base_margin = best
+
+    if best_error > MARGIN_ATOL:
+        raise ValueError(f"Compiled forest disagrees with XGBoost (max margin error {best_error:.3g})")
+    return forest
+
+
+def try_compile(model, name="model"):
+    """
+    compile_xgboost(), or None when the model cannot be compiled (unsupported
+    structure, margin check failed). The compiled path is only an
+    optimization, so the failure is logged and callers keep using XGBoost.
+    """
+    try:
+        return compile_xgboost(model)
+    except Exception as e:
+        logger.warning("Not compiling %s, using XGBoost for it: %s", name, e)
+        return None
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [c for node in frontier for c in (left[node], right[node]) if c != -1]
+        if frontier:
+            depth += 1
+    return depth
+
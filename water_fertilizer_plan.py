@@ -1,76 +1,220 @@
 import os
-import pickle
+import numpy as np
 import pandas as pd
+from crop_stats import NPK_STATISTIC, ensure_stats, normalize_crop
+from inference_client import InferenceError, inference_client
+from model_loader import LazyResource
+from model_registry import ModelPointer
+from tree_compiler import USE_COMPILED_TREES, try_compile
 
 # Paths
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "water_fertilizer_model.pkl")
 DATA_PATH = os.path.join(os.path.dirname(__file__), "datasets", "crop_water_fertilizer_plan.csv")
 
-# Load trained ML model and encoders
-with open(MODEL_PATH, "rb") as f:
-    data = pickle.load(f)
 
-model = data["model"]
-crop_encoder = data["crop_encoder"]
-irrigation_encoder = data["irrigation_encoder"]
-notes_encoder = data["notes_encoder"]
+# The registry's CURRENT irrigation model, or MODEL_PATH when the registry is not in use
+plan_pointer = ModelPointer("water_fertilizer")
 
-# Load CSV knowledge base
-crop_df = pd.read_csv(DATA_PATH)
+
+def _load_model():
+    token, data = plan_pointer.load()
+    forest = try_compile(data["model"], "water & fertilizer model") if USE_COMPILED_TREES else None
+    if forest is not None:
+        data["forest"] = forest
+    data["token"] = token
+    return data
+
+
+def _get_plan_model():
+    """
+    Loaded model; a new CURRENT (or a changed file) is swapped in on a
+    background thread. A version that fails to load is not retried.
+    """
+    data = plan_model.get()
+    if plan_pointer.changed(data["token"]):
+        plan_model.refresh()
+    return data
+
+
+# Trained ML model + encoders and the per-crop statistics table, loaded on first use.
+# In client mode (AGRIINTEL_INFERENCE_URL) the inference service owns them instead.
+plan_model = LazyResource("water_fertilizer_model", _load_model, preload=inference_client is None)
+crop_stats = LazyResource("crop_stats_table", lambda: ensure_stats(DATA_PATH), preload=inference_client is None)
 
 
 def get_water_fertilizer_plan(crop_name: str, soil_N: int, soil_P: int, soil_K: int, ph: float = 6.5):
     """
     Generate fertilizer + water planning for a given crop.
-    Uses ML model to predict irrigation type and CSV for fertilizer recommendations.
+    Uses ML model to predict irrigation type and the per-crop statistics table
+    (AGRIINTEL_NPK_STATISTIC, default median) for fertilizer recommendations.
     """
+    if inference_client is not None:
+        try:
+            return inference_client.plans([
+                {"crop": crop_name, "soil_N": soil_N, "soil_P": soil_P, "soil_K": soil_K, "ph": ph}
+            ])[0]
+        except InferenceError as e:
+            return {"error": f"Planner service unavailable: {e}"}
+
+    try:
+        data = _get_plan_model()
+        kb = crop_stats.get()
+    except Exception as e:
+        return {"error": f"Planner data unavailable: {e}"}
+    model = data.get("forest", data["model"])
+    crop_encoder = data["crop_encoder"]
+    irrigation_encoder = data["irrigation_encoder"]
 
-    # Find crop in CSV
-    crop_info = crop_df[crop_df["Crop"].str.lower() == crop_name.lower()]
-    if crop_info.empty:
+    # Find crop in the statistics table
+    crop_index = kb.lookup(crop_name)
+    if crop_index is None:
         return {"error": f"No fertilizer data available for crop '{crop_name}'"}
 
-    # Take first matching row
-    crop_row = crop_info.iloc[0]
-    recommended_N, recommended_P, recommended_K = crop_row["N"], crop_row["P"], crop_row["K"]
+    # Encode crop name for model (CSV spelling, so any capitalisation works)
+    crop_encoded = crop_encoder.transform([kb.names[crop_index]])[0]
+
+    # Predict irrigation type using model
+    irrigation_pred_encoded = model.predict([[crop_encoded, soil_N, soil_P, soil_K, ph]])[0]
+    irrigation_type = irrigation_encoder.inverse_transform([irrigation_pred_encoded])[0]
+
+    recommended_N, recommended_P, recommended_K = (
+        float(v) for v in kb.npk_for([crop_index], [irrigation_type], NPK_STATISTIC)[0]
+    )
 
     # Compute nutrient gaps (rounded to 2 decimals)
     gap_N = round(max(0, recommended_N - soil_N), 2)
     gap_P = round(max(0, recommended_P - soil_P), 2)
     gap_K = round(max(0, recommended_K - soil_K), 2)
 
-    # Encode crop name for model
-    crop_encoded = crop_encoder.transform([crop_name])[0]
+    return _plan_dict(crop_name, (recommended_N, recommended_P, recommended_K), (soil_N, soil_P, soil_K),
+                      (gap_N, gap_P, gap_K), irrigation_type, kb.notes[crop_index])
 
-    # Predict irrigation type using model
-    irrigation_pred_encoded = model.predict([[crop_encoded, soil_N, soil_P, soil_K, ph]])[0]
-    irrigation_type = irrigation_encoder.inverse_transform([irrigation_pred_encoded])[0]
 
+def _plan_dict(crop_name, recommended, soil, gaps, irrigation_type, notes):
     # Create structured plan
     plan = {
         "crop": crop_name,
-        "recommended_NPK": {
-            "N": recommended_N,
-            "P": recommended_P,
-            "K": recommended_K
-        },
-        "soil_NPK": {
-            "N": soil_N,
-            "P": soil_P,
-            "K": soil_K
-        },
-        "nutrient_gaps": {
-            "N": gap_N,
-            "P": gap_P,
-            "K": gap_K
-        },
+        "recommended_NPK": dict(zip("NPK", recommended)),
+        "soil_NPK": dict(zip("NPK", soil)),
+        "nutrient_gaps": dict(zip("NPK", gaps)),
         "irrigation": irrigation_type,
-        "notes": crop_row["Notes"]
+        "notes": notes
     }
 
     return plan
 
 
+def plans_to_dicts(frame, result):
+    """Rows of get_water_fertilizer_plans output as get_water_fertilizer_plan dicts."""
+    plans = []
+    for soil, row in zip(frame[["soil_N", "soil_P", "soil_K"]].itertuples(index=False), result.itertuples(index=False)):
+        if row.error is not None:
+            plans.append({"error": row.error})
+            continue
+        plans.append(_plan_dict(
+            row.crop,
+            (float(row.recommended_N), float(row.recommended_P), float(row.recommended_K)),
+            tuple(soil), (float(row.gap_N), float(row.gap_P), float(row.gap_K)), row.irrigation, row.notes,
+        ))
+    return plans
+
+
+# Columns expected by get_water_fertilizer_plans (ph defaults to 6.5 when absent)
+BATCH_COLUMNS = ["crop", "soil_N", "soil_P", "soil_K"]
+
+
+def get_water_fertilizer_plans(frame):
+    """
+    Batch version of get_water_fertilizer_plan.
+
+    `frame` has columns crop, soil_N, soil_P, soil_K and optionally ph.
+    Nutrient gaps are computed column-wise, crops are encoded in one pass
+    and the irrigation model runs once over every valid row. In client mode
+    (AGRIINTEL_INFERENCE_URL) the rows go to the inference service in one
+    request instead. Returns a DataFrame on the same index with
+    recommended_N/P/K, gap_N/P/K, irrigation, notes and error (None for rows
+    that were planned).
+    """
+    frame = pd.DataFrame(frame)
+    missing = [c for c in BATCH_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"get_water_fertilizer_plans: missing columns {missing}")
+
+    result = pd.DataFrame({"crop": frame["crop"]}, index=frame.index)
+    for column in ("recommended_N", "recommended_P", "recommended_K", "gap_N", "gap_P", "gap_K"):
+        result[column] = np.nan
+    result["irrigation"] = None
+    result["notes"] = None
+    errors = pd.Series(None, index=frame.index, dtype=object)
+
+    if inference_client is not None:
+        return _get_plans_remote(frame, result)
+
+    try:
+        data = _get_plan_model()
+        kb = crop_stats.get()
+    except Exception as e:
+        result["error"] = f"Planner data unavailable: {e}"
+        return result
+
+    # Soil test values
+    soil = pd.DataFrame({
+        "N": frame["soil_N"], "P": frame["soil_P"], "K": frame["soil_K"],
+        "ph": frame["ph"] if "ph" in frame.columns else 6.5,
+    }, index=frame.index).apply(pd.to_numeric, errors="coerce")
+    bad = soil.isna().any(axis=1)
+    errors[bad] = "Invalid soil N/P/K/pH value"
+
+    # Crop lookup: one dict hit per distinct crop name
+    crop_index = frame["crop"].map({name: kb.lookup(name) for name in frame["crop"].unique()})
+    bad = errors.isna() & crop_index.isna()
+    errors[bad] = frame.loc[bad, "crop"].map(lambda c: f"No fertilizer data available for crop '{c}'")
+
+    ok = errors.isna().to_numpy()
+    if ok.any():
+        idx = crop_index[ok].to_numpy(dtype=int)
+        values = soil[ok].to_numpy(dtype=float)
+        crop_encoded = data["crop_encoder"].transform(np.asarray(kb.names, dtype=object)[idx])
+        features = np.column_stack([crop_encoded, values])
+        irrigation = data["irrigation_encoder"].inverse_transform(data["model"].predict(features))
+
+        recommended = kb.npk_for(idx, irrigation, NPK_STATISTIC)
+        gaps = np.round(np.maximum(0, recommended - values[:, :3]), 2)
+
+        result.loc[ok, ["recommended_N", "recommended_P", "recommended_K"]] = recommended
+        result.loc[ok, ["gap_N", "gap_P", "gap_K"]] = gaps
+        result.loc[ok, "irrigation"] = irrigation
+        result.loc[ok, "notes"] = np.asarray(kb.notes, dtype=object)[idx]
+
+    result["error"] = errors.where(errors.notna(), None)
+    return result
+
+
+def _get_plans_remote(frame, result):
+    """Fill `result` for get_water_fertilizer_plans from the inference service."""
+    ph = frame["ph"] if "ph" in frame.columns else pd.Series(6.5, index=frame.index)
+    rows = [
+        {"crop": crop, "soil_N": n, "soil_P": p, "soil_K": k, "ph": v}
+        for crop, n, p, k, v in zip(frame["crop"].tolist(), frame["soil_N"].tolist(), frame["soil_P"].tolist(),
+                                    frame["soil_K"].tolist(), ph.tolist())
+    ]
+    try:
+        plans = inference_client.plans(rows)
+    except InferenceError as e:
+        result["error"] = f"Planner service unavailable: {e}"
+        return result
+
+    planned = [p for p in plans if "error" not in p]
+    ok = np.array(["error" not in p for p in plans], dtype=bool)
+    for nutrient in ("N", "P", "K"):
+        result.loc[ok, f"recommended_{nutrient}"] = [p["recommended_NPK"][nutrient] for p in planned]
+        result.loc[ok, f"gap_{nutrient}"] = [p["nutrient_gaps"][nutrient] for p in planned]
+    result["irrigation"] = [p.get("irrigation") for p in plans]
+    result["notes"] = [p.get("notes") for p in plans]
+    result["error"] = [p.get("error") for p in plans]
+    return result
+
+
 # Quick test
 if __name__ == "__main__":
     sample_plan = get_water_fertilizer_plan("Rice", soil_N=30, soil_P=20, soil_K=25)
@@ -1,16 +1,175 @@
+import os
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from weather_cache import WeatherCache
+
+API_KEY = os.environ.get("OPENWEATHER_API_KEY", "40bc60c2d9e8f065643bad455c961b72")  # 🔑 Replace with your API key
+BASE_URL = os.environ.get("AGRIINTEL_WEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class WeatherAPIError(Exception):
+    """Raised when weather cannot be fetched for a city."""
+
+
+class CircuitOpenError(WeatherAPIError):
+    """Raised without touching the network while the provider is marked down."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failed attempts the circuit opens and calls fail
+    fast for `reset_timeout` seconds. Then a single trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            # open, or half-open with the trial call already in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class WeatherClient:
+    """
+    OpenWeatherMap client with a pooled keep-alive session, connect/read
+    timeouts, bounded exponential backoff with full jitter and a circuit breaker.
+    """
+
+    def __init__(self, api_key=API_KEY, base_url=BASE_URL, connect_timeout=3.05, read_timeout=5.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, failure_threshold=5,
+                 reset_timeout=30.0, pool_maxsize=10):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, city, before_attempt=None):
+        """
+        Return (temperature, humidity, rainfall) for `city`. `before_attempt`,
+        if given, is called before every request to the provider, retries
+        included (prefetch_weather.py takes a rate-limit token there).
+        """
+        params = {"q": city, "appid": self.api_key, "units": "metric"}
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Weather service unavailable (circuit open). Try again shortly.")
+            if before_attempt is not None:
+                before_attempt()
+
+            retry_after = None
+            # Every attempt records an outcome, whatever it raises; otherwise a half-open trial
+            # that escaped with an unexpected error would leave the breaker half-open for good
+            outcome = self.breaker.record_failure
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRYABLE_STATUS:
+                    data = self._json(response)
+                    if str(data.get("cod")) != "200":
+                        outcome = self.breaker.record_success  # the provider answered; the city or key is wrong
+                        raise WeatherAPIError("Error fetching weather. Check city name or API key.")
+                    weather = self._parse(data)
+                    outcome = self.breaker.record_success
+                    return weather
+                last_error = WeatherAPIError(f"Weather provider returned HTTP {response.status_code}")
+                retry_after = response.headers.get("Retry-After")
+            except requests.RequestException as e:
+                last_error = e
+            finally:
+                outcome()
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        raise WeatherAPIError(f"Error fetching weather after {self.max_retries + 1} attempts: {last_error}")
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt, retry_after=None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    @staticmethod
+    def _json(response):
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise WeatherAPIError("Weather provider returned an invalid response.")
+        return data
+
+    @staticmethod
+    def _parse(data):
+        try:
+            temperature = data['main']['temp']
+            humidity = data['main']['humidity']
+            rainfall = data.get('rain', {}).get('1h', 0)  # mm rain in last 1 hour
+        except (KeyError, TypeError, AttributeError):
+            raise WeatherAPIError("Weather provider returned an invalid response.")
+        return temperature, humidity, rainfall
+
+
+# Shared client and cache: in-process LRU + SQLite, keyed by normalized city name
+weather_client = WeatherClient()
+
+
+def fetch_weather(city):
+    """Fetch current weather for `city` from the provider (no caching)."""
+    return weather_client.fetch(city)
+
+
+weather_cache = WeatherCache(fetch_weather)
+
 
 def get_weather(city):
-    API_KEY = "40bc60c2d9e8f065643bad455c961b72"  # 🔑 Replace with your API key
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={API_KEY}&units=metric"
-    
-    response = requests.get(url).json()
-    
-    if response.get("cod") != 200:
-        raise Exception("Error fetching weather. Check city name or API key.")
-
-    temperature = response['main']['temp']
-    humidity = response['main']['humidity']
-    rainfall = response.get('rain', {}).get('1h', 0)  # mm rain in last 1 hour
-    
-    return temperature, humidity, rainfall
+    """Cached weather lookup; only goes to the network on a miss or expiry."""
+    return weather_cache.get(city)
@@ -0,0 +1,193 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from cache_utils import LRUCache
+
+# Paths & settings (override with environment variables)
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+DB_PATH = os.environ.get("AGRIINTEL_WEATHER_DB", os.path.join(CACHE_DIR, "weather.sqlite"))
+WEATHER_TTL = float(os.environ.get("AGRIINTEL_WEATHER_TTL", 600))              # seconds a reading is fresh
+WEATHER_STALE_TTL = float(os.environ.get("AGRIINTEL_WEATHER_STALE_TTL", 3600))  # extra seconds it may be served stale
+WEATHER_CACHE_SIZE = int(os.environ.get("AGRIINTEL_WEATHER_CACHE_SIZE", 2048))
+KEY_LOCK_STRIPES = 64  # misses for cities hashing to the same stripe are serialized
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_city(city) -> str:
+    """Cache key for a city: trimmed, single-spaced and case-folded."""
+    return " ".join(str(city).split()).casefold()
+
+
+class WeatherCache:
+    """
+    Two-level weather cache: an in-process LRU in front of a SQLite table.
+
+    Fresh entries (younger than `ttl`) are served directly. Entries up to
+    `ttl + stale_ttl` old are served immediately while a background thread
+    refreshes them. Anything older, or missing, is fetched synchronously.
+    """
+
+    def __init__(self, fetch, db_path=DB_PATH, ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL,
+                 maxsize=WEATHER_CACHE_SIZE):
+        self.fetch = fetch
+        self.db_path = db_path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._memory = LRUCache(maxsize)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        self._refreshing = set()
+        self._disk_ok = db_path is not None
+        self.counters = {"hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "refresh_errors": 0}
+
+    # ======================
+    # Public API
+    # ======================
+    def get(self, city):
+        """Return (temperature, humidity, rainfall) for `city`."""
+        key = normalize_city(city)
+        entry = self._lookup(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.ttl:
+                self._count("hits")
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(city, key)
+                return value
+
+        # Miss: only one thread per city goes to the network
+        with self._key_lock(key):
+            entry = self._lookup(key)
+            if entry is not None and time.time() - entry[1] < self.ttl:
+                self._count("hits")
+                return entry[0]
+            self._count("misses")
+            return self._refresh(city, key)
+
+    def put(self, city, value, fetched_at=None):
+        """Store a (temperature, humidity, rainfall) reading for `city`."""
+        key = normalize_city(city)
+        entry = (tuple(value), fetched_at if fetched_at is not None else time.time())
+        self._memory.put(key, entry)
+        self._write_disk(key, entry)
+
+    def is_fresh(self, city) -> bool:
+        """True if a reading younger than the TTL is cached for `city`."""
+        entry = self._lookup(normalize_city(city))
+        return entry is not None and time.time() - entry[1] < self.ttl
+
+    def invalidate(self, city=None):
+        """Drop one city, or everything when `city` is None."""
+        if city is None:
+            self._memory.clear()
+            self._execute("DELETE FROM weather")
+        else:
+            key = normalize_city(city)
+            self._memory.pop(key)
+            self._execute("DELETE FROM weather WHERE city = ?", (key,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        stats["memory"] = self._memory.stats()
+        stats["disk_enabled"] = self._disk_ok
+        return stats
+
+    # ======================
+    # Internals
+    # ======================
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _lookup(self, key):
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._count("disk_hits")
+                self._memory.put(key, entry)
+        return entry
+
+    def _refresh(self, city, key):
+        value = tuple(self.fetch(city))
+        self.put(key, value)
+        return value
+
+    def _refresh_in_background(self, city, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def worker():
+            try:
+                self._refresh(city, key)
+            except Exception:
+                # Keep serving the stale reading; the next request retries
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, name=f"weather-refresh-{key}", daemon=True).start()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self._disk_ok:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS weather ("
+                    "city TEXT PRIMARY KEY, temperature REAL, humidity REAL, rainfall REAL, fetched_at REAL)"
+                )
+                conn.commit()
+                self._local.conn = conn
+            except (OSError, sqlite3.Error) as e:
+                # Read-only or broken disk: fall back to the in-process LRU only
+                logger.warning("Weather cache disk store disabled: %s", e)
+                self._disk_ok = False
+                conn = None
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.Error:
+            return None
+
+    def _read_disk(self, key):
+        rows = self._execute(
+            "SELECT temperature, humidity, rainfall, fetched_at FROM weather WHERE city = ?", (key,)
+        )
+        if not rows:
+            return None
+        temperature, humidity, rainfall, fetched_at = rows[0]
+        return (temperature, humidity, rainfall), fetched_at
+
+    def _write_disk(self, key, entry):
+        (temperature, humidity, rainfall), fetched_at = entry
+        self._execute(
+            "INSERT OR REPLACE INTO weather (city, temperature, humidity, rainfall, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, temperature, humidity, rainfall, fetched_at),
+        )